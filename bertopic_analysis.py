@@ -7,7 +7,7 @@ Advanced Topic Modeling and Sentiment Analysis System
 Complete system combining BERTopic for topic modeling and pysentimiento for emotion analysis,
 based on Natalia's research methodology for Russian tweet analysis.
 
-Input: CSV files with tweet data (text column)
+Input: CSV or Parquet files with tweet data (text column)
 Output: Topics, emotions, and comprehensive visualizations
 
 Author: Jonathan Uri
@@ -19,7 +19,9 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from bertopic import BERTopic
+from bertopic.backend import BaseEmbedder
 from pysentimiento import create_analyzer
+from sentence_transformers import SentenceTransformer
 from sklearn.feature_extraction.text import CountVectorizer
 from umap import UMAP
 from hdbscan import HDBSCAN
@@ -31,14 +33,22 @@ from pathlib import Path
 import os
 from datetime import datetime
 import logging
+import hashlib
+import math
+import torch
+import torch.multiprocessing as mp
 from tqdm import tqdm
 
 warnings.filterwarnings("ignore")
 
+# Let cuDNN pick the fastest kernels for the fixed embedding batch shapes
+torch.backends.cudnn.benchmark = True
+
 # Configuration
 INPUT_FOLDER = "/UPDATE/THIS/PATH/"  # UPDATE THIS PATH
 OUTPUT_FOLDER = "topic_emotion_analysis_results"
 LOG_FILE = "topic_analysis.log"
+EMBEDDING_CACHE_FOLDER = "embedding_cache"
 
 # Analysis parameters
 MIN_TOPIC_SIZE = 10          # Minimum size for topics
@@ -46,6 +56,125 @@ N_NEIGHBORS = 15             # UMAP neighbors
 N_COMPONENTS = 5             # UMAP dimensions
 MIN_CLUSTER_SIZE = 10        # HDBSCAN minimum cluster size
 RANDOM_STATE = 42           # For reproducibility
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # SentenceTransformer used by BERTopic
+EMBEDDING_BATCH_SIZE = 256   # Texts per embedding forward pass
+EMOTION_BATCH_SIZE_CPU = 64   # Texts per emotion forward pass on CPU
+EMOTION_BATCH_SIZE_GPU = 128  # Texts per emotion forward pass on GPU
+EMOTION_MODEL_MEM_GB = 2      # Approximate GPU memory per emotion model replica
+
+# Emotion analyzer owned by each worker process (set by _init_emotion_worker)
+_worker_emotion_analyzer = None
+
+
+def _predict_emotions(analyzer, texts, batch_size, show_progress=True):
+    """
+    Predict emotions for texts in length-sorted batches.
+    
+    Parameters:
+    - analyzer: pysentimiento emotion analyzer
+    - texts (list): List of texts to analyze
+    - batch_size (int): Number of texts per predict call
+    - show_progress (bool): Show a tqdm progress bar
+    
+    Returns:
+    - list: Detected emotions in input order
+    """
+    logger = logging.getLogger(__name__)
+    emotions = ["others"] * len(texts)
+    
+    # Group texts of similar length so each batch pads to a similar size
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    num_batches = math.ceil(len(order) / batch_size)
+    
+    for batch_num in tqdm(range(num_batches), desc="Emotion analysis", disable=not show_progress):
+        batch_indices = order[batch_num * batch_size:(batch_num + 1) * batch_size]
+        batch_texts = [texts[i] for i in batch_indices]
+        
+        try:
+            results = analyzer.predict(batch_texts)
+            for i, result in zip(batch_indices, results):
+                emotions[i] = result.output.lower()
+        except Exception as e:
+            # Fall back to per-text prediction to isolate the failing input
+            logger.warning(f"Error analyzing emotion batch, retrying per text: {e}")
+            for i, text in zip(batch_indices, batch_texts):
+                try:
+                    emotions[i] = analyzer.predict(text).output.lower()
+                except Exception as e:
+                    logger.warning(f"Error analyzing emotion for text: {e}")
+    
+    return emotions
+
+
+def _init_emotion_worker(language):
+    """Load a private emotion analyzer inside a worker process"""
+    global _worker_emotion_analyzer
+    _worker_emotion_analyzer = create_analyzer(task="emotion", lang=language)
+
+
+def _predict_emotion_shard(args):
+    """Predict emotions for one shard of texts using the worker's analyzer"""
+    texts, batch_size = args
+    return _predict_emotions(_worker_emotion_analyzer, texts, batch_size, show_progress=False)
+
+
+def _resolve_emotion_workers(requested):
+    """
+    Cap the number of emotion worker processes by CPU cores and GPU memory.
+    
+    Parameters:
+    - requested (int): Desired number of worker processes
+    
+    Returns:
+    - int: Number of workers that fit on this machine
+    """
+    limit = mp.cpu_count()
+    if torch.cuda.is_available():
+        gpu_mem_gb = torch.cuda.get_device_properties(0).total_memory / 1024 ** 3
+        limit = min(limit, max(1, int(gpu_mem_gb // EMOTION_MODEL_MEM_GB)))
+    return max(1, min(requested, limit))
+
+
+class BatchedSentenceTransformerBackend(BaseEmbedder):
+    """
+    BERTopic embedding backend that encodes in large batches on the model's device.
+    
+    BERTopic's default backend encodes with sentence-transformers' batch size of 32;
+    this backend uses EMBEDDING_BATCH_SIZE, keeps batches as tensors on the device and
+    returns L2-normalized float32 vectors.
+    """
+    
+    def __init__(self, embedding_model, batch_size=EMBEDDING_BATCH_SIZE):
+        """
+        Parameters:
+        - embedding_model (SentenceTransformer): Model used to encode documents
+        - batch_size (int): Texts per encode forward pass
+        """
+        super().__init__(embedding_model=embedding_model)
+        self.batch_size = batch_size
+    
+    def embed(self, documents, verbose=False):
+        """
+        Embed documents.
+        
+        Parameters:
+        - documents (list): Texts to embed
+        - verbose (bool): Show a progress bar
+        
+        Returns:
+        - np.ndarray: float32 embeddings of shape (n_documents, embedding_dim)
+        """
+        # sentence-transformers already sorts each call by length to limit padding
+        embeddings = self.embedding_model.encode(
+            documents,
+            batch_size=self.batch_size,
+            show_progress_bar=verbose,
+            convert_to_tensor=True,
+            normalize_embeddings=True
+        )
+        # Half-precision models return reduced-precision vectors; UMAP expects float32
+        return embeddings.float().cpu().numpy()
+
 
 class TopicEmotionAnalyzer:
     """
@@ -55,20 +184,28 @@ class TopicEmotionAnalyzer:
     Output: Topic models, emotion analysis, and visualizations
     """
     
-    def __init__(self, language="en", min_topic_size=MIN_TOPIC_SIZE):
+    def __init__(self, language="en", min_topic_size=MIN_TOPIC_SIZE, batch_size=None, num_workers=1):
         """
         Initialize the analyzer with specified parameters.
         
         Parameters:
         - language (str): Language for emotion analysis ("en", "es", "pt")
         - min_topic_size (int): Minimum size for topic clustering
+        - batch_size (int): Texts per emotion inference call (default: 128 on GPU, 64 on CPU)
+        - num_workers (int): Emotion worker processes, each with its own model replica
         """
         self.language = language
         self.min_topic_size = min_topic_size
+        if batch_size is None:
+            batch_size = EMOTION_BATCH_SIZE_GPU if torch.cuda.is_available() else EMOTION_BATCH_SIZE_CPU
+        self.batch_size = batch_size
+        self.num_workers = _resolve_emotion_workers(num_workers)
         self.setup_logging()
         
         # Initialize models
         self.emotion_analyzer = None
+        self.embedding_model = None
+        self.embedding_backend = None
         self.topic_model = None
         self.results = {}
         
@@ -98,6 +235,10 @@ class TopicEmotionAnalyzer:
             # Initialize BERTopic with optimized parameters
             print("🔍 Setting up BERTopic model...")
             
+            # Sentence embedding model (embeddings are cached, see _get_embeddings)
+            self.embedding_model = self._create_embedding_model()
+            self.embedding_backend = BatchedSentenceTransformerBackend(self.embedding_model)
+            
             # UMAP model for dimensionality reduction
             umap_model = UMAP(
                 n_neighbors=N_NEIGHBORS,
@@ -126,6 +267,7 @@ class TopicEmotionAnalyzer:
             
             # Create BERTopic model
             self.topic_model = BERTopic(
+                embedding_model=self.embedding_backend,
                 umap_model=umap_model,
                 hdbscan_model=hdbscan_model,
                 vectorizer_model=vectorizer_model,
@@ -141,12 +283,32 @@ class TopicEmotionAnalyzer:
             self.logger.error(f"Error initializing models: {e}")
             raise
     
+    def _create_embedding_model(self):
+        """
+        Create the SentenceTransformer, in half precision when a GPU is available.
+        
+        Returns:
+        - SentenceTransformer: Embedding model (BF16 on GPUs that support it,
+          FP16 on other GPUs, FP32 on CPU)
+        """
+        if not torch.cuda.is_available():
+            return SentenceTransformer(EMBEDDING_MODEL, device="cpu")
+        
+        embedding_model = SentenceTransformer(EMBEDDING_MODEL, device="cuda")
+        if torch.cuda.is_bf16_supported():
+            embedding_model = embedding_model.to(torch.bfloat16)
+            print("⚡ Embedding model running in BF16 on GPU")
+        else:
+            embedding_model = embedding_model.half()
+            print("⚡ Embedding model running in FP16 on GPU")
+        return embedding_model
+    
     def load_data(self, file_path, text_column="text", date_column=None):
         """
         Load and prepare data for analysis.
         
         Parameters:
-        - file_path (str): Path to CSV file
+        - file_path (str): Path to CSV or Parquet file
         - text_column (str): Name of column containing text data
         - date_column (str): Name of column containing date data (optional)
         
@@ -155,7 +317,10 @@ class TopicEmotionAnalyzer:
         """
         try:
             print(f"📂 Loading data from: {file_path}")
-            df = pd.read_csv(file_path)
+            if Path(file_path).suffix == ".parquet":
+                df = pd.read_parquet(file_path)
+            else:
+                df = pd.read_csv(file_path)
             
             # Validate required columns
             if text_column not in df.columns:
@@ -182,6 +347,11 @@ class TopicEmotionAnalyzer:
         """
         Analyze emotions in text data using pysentimiento.
         
+        Texts are sorted by length and predicted in batches of self.batch_size
+        to reduce per-call overhead and padding. With num_workers > 1 the texts
+        are split into contiguous shards, one per spawned worker process.
+        On NVIDIA GPUs, run under nvidia-cuda-mps-control so workers share the device.
+        
         Parameters:
         - texts (list): List of texts to analyze
         
@@ -189,19 +359,64 @@ class TopicEmotionAnalyzer:
         - list: List of detected emotions
         """
         print("🎭 Analyzing emotions...")
-        emotions = []
+        texts = list(texts)
         
-        for text in tqdm(texts, desc="Emotion analysis"):
-            try:
-                result = self.emotion_analyzer.predict(text)
-                emotions.append(result.output.lower())
-            except Exception as e:
-                emotions.append("others")
-                self.logger.warning(f"Error analyzing emotion for text: {e}")
+        if self.num_workers > 1 and len(texts) > self.batch_size:
+            print(f"⚙️  Using {self.num_workers} emotion worker processes")
+            shard_size = math.ceil(len(texts) / self.num_workers)
+            shards = [(texts[start:start + shard_size], self.batch_size)
+                      for start in range(0, len(texts), shard_size)]
+            
+            # CUDA state is not fork-safe, so workers are spawned fresh
+            ctx = mp.get_context("spawn")
+            with ctx.Pool(processes=len(shards), initializer=_init_emotion_worker,
+                          initargs=(self.language,)) as pool:
+                emotions = [emotion for shard in pool.map(_predict_emotion_shard, shards)
+                            for emotion in shard]
+        else:
+            emotions = _predict_emotions(self.emotion_analyzer, texts, self.batch_size)
         
         print(f"✅ Emotion analysis completed for {len(emotions)} texts")
         return emotions
     
+    def _get_embeddings(self, texts):
+        """
+        Get sentence embeddings for texts, reusing a cached copy when available.
+        
+        Embeddings are stored as .npy files keyed by a hash of the model name,
+        its encode precision and the texts, so re-runs on unchanged data skip
+        the transformer pass.
+        
+        Parameters:
+        - texts (list): List of texts to embed
+        
+        Returns:
+        - np.ndarray: Embedding matrix of shape (n_texts, embedding_dim)
+        """
+        # FP16/BF16 and FP32 encodes give slightly different vectors
+        model_dtype = next(self.embedding_model.parameters()).dtype
+        digest = hashlib.sha1(f"{EMBEDDING_MODEL}:{model_dtype}:normalized".encode("utf-8"))
+        for text in texts:
+            digest.update(text.encode("utf-8"))
+            digest.update(b"\n")
+        cache_file = Path(EMBEDDING_CACHE_FOLDER) / f"{digest.hexdigest()[:16]}.npy"
+        
+        if cache_file.exists():
+            print(f"♻️  Loading cached embeddings: {cache_file}")
+            return np.load(cache_file)
+        
+        print("🧮 Computing sentence embeddings...")
+        embeddings = self.embedding_backend.embed(texts, verbose=True)
+        
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # Replace in one step, so an interrupted save leaves no truncated cache
+        tmp_file = cache_file.with_suffix(".npy.tmp")
+        with open(tmp_file, "wb") as f:
+            np.save(f, embeddings)
+        os.replace(tmp_file, cache_file)
+        self.logger.info(f"Embeddings cached to {cache_file}")
+        return embeddings
+    
     def perform_topic_modeling(self, texts):
         """
         Perform topic modeling using BERTopic.
@@ -215,8 +430,9 @@ class TopicEmotionAnalyzer:
         print("🔍 Performing topic modeling with BERTopic...")
         
         try:
-            # Fit the model and predict topics
-            topics, probabilities = self.topic_model.fit_transform(texts)
+            # Fit the model and predict topics on cached embeddings
+            embeddings = self._get_embeddings(texts)
+            topics, probabilities = self.topic_model.fit_transform(texts, embeddings=embeddings)
             
             # Get topic information
             topic_info = self.topic_model.get_topic_info()
@@ -235,6 +451,35 @@ class TopicEmotionAnalyzer:
             self.logger.error(f"Error in topic modeling: {e}")
             raise
     
+    def _max_topic_probabilities(self, probabilities, num_docs):
+        """
+        Get each document's highest topic probability.
+        
+        Parameters:
+        - probabilities: BERTopic probabilities, normally an (n_docs, n_topics) array
+        - num_docs (int): Number of documents
+        
+        Returns:
+        - np.ndarray: float32 array of per-document maximum probabilities
+        """
+        if probabilities is None:
+            return np.zeros(num_docs, dtype=np.float32)
+        
+        try:
+            probs = np.asarray(probabilities, dtype=np.float32)
+        except ValueError:
+            # Ragged per-document arrays
+            return np.fromiter((np.max(p) if np.size(p) else 0.0 for p in probabilities),
+                               dtype=np.float32, count=num_docs)
+        
+        if probs.ndim == 2:
+            if probs.shape[1] == 0:
+                return np.zeros(num_docs, dtype=np.float32)
+            return probs.max(axis=1)
+        
+        # 1D: already one probability per document
+        return probs
+    
     def create_topic_visualizations(self, save_folder):
         """
         Create comprehensive topic visualizations.
@@ -269,6 +514,28 @@ class TopicEmotionAnalyzer:
         except Exception as e:
             self.logger.error(f"Error creating topic visualizations: {e}")
     
+    def _get_emotion_topic_counts(self, df):
+        """
+        Count documents per (emotion, topic) pair.
+        
+        The table for the stored analysis results is computed once and cached
+        in self.results, so visualizations and the summary report share it.
+        
+        Parameters:
+        - df (pd.DataFrame): DataFrame with 'emotion' and 'topic' columns
+        
+        Returns:
+        - pd.DataFrame: Counts with emotions as rows and topics as columns
+        """
+        is_results_df = self.results.get('dataframe') is df
+        if is_results_df and 'emotion_topic_counts' in self.results:
+            return self.results['emotion_topic_counts']
+        
+        counts = df.groupby(['emotion', 'topic'], observed=True).size().unstack('topic', fill_value=0)
+        if is_results_df:
+            self.results['emotion_topic_counts'] = counts
+        return counts
+    
     def create_emotion_visualizations(self, df, save_folder):
         """
         Create emotion analysis visualizations.
@@ -305,7 +572,7 @@ class TopicEmotionAnalyzer:
         
         # Emotion-Topic heatmap
         if 'topic' in df.columns:
-            emotion_topic_crosstab = pd.crosstab(df['emotion'], df['topic'])
+            emotion_topic_crosstab = self._get_emotion_topic_counts(df)
             sns.heatmap(emotion_topic_crosstab.iloc[:, :10], annot=True, fmt='d', 
                        cmap='YlOrRd', ax=axes[1, 1])
             axes[1, 1].set_title('Emotion-Topic Correlation', fontsize=14, fontweight='bold')
@@ -323,8 +590,9 @@ class TopicEmotionAnalyzer:
     def _create_temporal_analysis(self, df, save_folder):
         """Create time-based emotion and topic analysis"""
         try:
-            # Convert date column
-            df['date'] = pd.to_datetime(df['date'], errors='coerce')
+            # Convert date column (already done in load_data when it is the date_column)
+            if not pd.api.types.is_datetime64_any_dtype(df['date']):
+                df['date'] = pd.to_datetime(df['date'], errors='coerce')
             df = df.dropna(subset=['date'])
             
             # Group by month
@@ -359,7 +627,7 @@ class TopicEmotionAnalyzer:
         Perform complete analysis on dataset.
         
         Parameters:
-        - file_path (str): Path to CSV file
+        - file_path (str): Path to CSV or Parquet file
         - text_column (str): Name of text column
         - date_column (str): Name of date column (optional)
         
@@ -371,24 +639,32 @@ class TopicEmotionAnalyzer:
         # Load data
         df = self.load_data(file_path, text_column, date_column)
         
-        # Prepare texts
-        texts = df[text_column].tolist()
+        # Prepare texts - duplicates (retweets, copy-paste) are analyzed once
+        text_codes, unique_texts = pd.factorize(df[text_column])
+        texts = unique_texts.tolist()
+        duplicate_ratio = 1 - len(texts) / len(df) if len(df) else 0.0
+        print(f"♻️  {len(texts):,} unique texts ({duplicate_ratio:.1%} duplicates skipped)")
+        self.logger.info(f"Deduplicated {len(df)} texts to {len(texts)} unique texts")
         
         # Analyze emotions
         emotions = self.analyze_emotions(texts)
-        df['emotion'] = emotions
+        df['emotion'] = np.asarray(emotions, dtype=object)[text_codes]
         
         # Perform topic modeling
         topics, probabilities, topic_info = self.perform_topic_modeling(texts)
-        df['topic'] = topics
-        df['topic_probability'] = [prob.max() if len(prob) > 0 else 0.0 for prob in probabilities]
+        df['topic'] = np.asarray(topics)[text_codes]
+        df['topic_probability'] = self._max_topic_probabilities(probabilities, len(texts))[text_codes]
         
         # Add topic names
-        topic_names = {}
-        for _, row in topic_info.iterrows():
-            topic_names[row['Topic']] = row['Name']
+        topic_names = topic_info.set_index('Topic')['Name']
         df['topic_name'] = df['topic'].map(topic_names)
         
+        # Compact dtypes for the low-cardinality result columns
+        df['emotion'] = df['emotion'].astype('category')
+        df['topic'] = pd.to_numeric(df['topic'], downcast='integer')
+        df['topic_probability'] = df['topic_probability'].astype('float32')
+        df['topic_name'] = df['topic_name'].astype('category')
+        
         # Store results
         self.results = {
             'dataframe': df,
@@ -403,9 +679,9 @@ class TopicEmotionAnalyzer:
         self.create_topic_visualizations(output_folder)
         self.create_emotion_visualizations(df, output_folder)
         
-        # Save processed data
-        output_file = output_folder / "analyzed_data_with_topics_emotions.csv"
-        df.to_csv(output_file, index=False)
+        # Save processed data (Parquet keeps dtypes and is much faster than CSV)
+        output_file = output_folder / "analyzed_data_with_topics_emotions.parquet"
+        df.to_parquet(output_file, compression="snappy", index=False)
         
         # Save topic information
         topic_info.to_csv(output_folder / "topic_information.csv", index=False)
@@ -452,7 +728,7 @@ class TopicEmotionAnalyzer:
         
         # Topic-Emotion correlation
         print(f"\n🔗 Topic-Emotion Insights:")
-        emotion_topic_corr = pd.crosstab(df['emotion'], df['topic'])
+        emotion_topic_corr = self._get_emotion_topic_counts(df)
         
         for emotion in emotion_dist.head(5).index:
             top_topic = emotion_topic_corr.loc[emotion].idxmax()
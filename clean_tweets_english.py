@@ -5,22 +5,48 @@ Russian Tweet Cleaning System - Stage 1
 =======================================
 
 Input: russian_lang_tweets_part{1-609}.csv files
-Output: cleaned_tweets_batch{1-n}.csv files with cleaned text
+Output: cleaned_tweets_batch{1-n}.parquet files with cleaned text
 
 Author: [Yonatan ori]
 Date: July 2025
 """
 
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 import re
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
+# Numba is optional - without it the regex cleaning path is used
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 # Configuration settings
 SCRIPT_FOLDER = os.path.dirname(os.path.realpath(__file__))
 INPUT_FOLDER = '/path/to/your/data/'  # UPDATE THIS PATH
 CHUNK_SIZE = 50000  # Optimal batch size for processing
 NUM_INPUT_FILES = 609  # Total input files
+KEEP_COLUMNS = ['TWEET']  # Input columns carried into the batch files
+MAX_WORKERS = os.cpu_count() or 1  # Parallel file-cleaning processes
+MAX_PENDING_FILES = MAX_WORKERS * 2  # Cleaned files allowed in flight at once
+
+# Precompiled cleaning patterns
+STRIP_PATTERN = re.compile(r"http\S+|#\w+|@\w+")  # URLs, hashtags and mentions
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Same patterns for pyarrow's regex engine (RE2), whose \w and \s are
+# ASCII-only - the Unicode classes are spelled out so Cyrillic hashtags match
+ARROW_SPACE_CLASS = r"\s\v\x1c-\x1f\x85\p{Z}"
+ARROW_STRIP_PATTERN = rf"http[^{ARROW_SPACE_CLASS}]+|#[\p{{L}}\p{{N}}_]+|@[\p{{L}}\p{{N}}_]+"
+ARROW_WHITESPACE_PATTERN = rf"[{ARROW_SPACE_CLASS}]+"
 
 
 def clean_tweet(text):
@@ -44,21 +70,271 @@ def clean_tweet(text):
     if not isinstance(text, str):
         return ""
 
-    # Remove URLs (http/https links)
-    text = re.sub(r"http\S+", "", text)
+    # Remove URLs, hashtags and mentions in a single pass
+    # Note: emojis and punctuation marks are preserved naturally
+    text = STRIP_PATTERN.sub("", text)
+    
+    # Normalize whitespace - replace multiple spaces with single space
+    return WHITESPACE_PATTERN.sub(" ", text).strip()
+
+
+def clean_tweet_series(texts):
+    """
+    Vectorized version of clean_tweet for a whole column of tweets
     
-    # Remove hashtags (but not the words themselves) 
-    text = re.sub(r"#\w+", "", text)
+    Args:
+        texts (pd.Series): Original tweet texts
+        
+    Returns:
+        pd.Series: Clean texts (missing values become empty strings)
+        
+    Applies the same cleaning rules as clean_tweet, but runs each regex
+    over the entire column at once instead of calling Python per row.
+    Uses the Numba byte scanner when Numba is installed.
+    """
+    if NUMBA_AVAILABLE:
+        return _clean_tweet_series_numba(texts)
     
-    # Remove mentions (@username)
-    text = re.sub(r"@\w+", "", text)
+    texts = texts.astype('string[pyarrow]').fillna("")
     
-    # Note: emojis and punctuation marks are preserved naturally
+    # Remove URLs, hashtags and mentions in a single pass
+    # (pattern strings keep pyarrow strings on the native kernel; compiled
+    # patterns would fall back to a per-row Python loop)
+    texts = texts.str.replace(ARROW_STRIP_PATTERN, "", regex=True)
     
     # Normalize whitespace - replace multiple spaces with single space
-    text = re.sub(r"\s+", " ", text).strip()
+    return texts.str.replace(ARROW_WHITESPACE_PATTERN, " ", regex=True).str.strip()
+
+
+@lru_cache(maxsize=1)
+def _unicode_class_tables():
+    """
+    Builds codepoint lookup tables matching Python's regex classes \\w and \\s
     
-    return text
+    Returns:
+        tuple: (is_word, is_space) boolean arrays indexed by codepoint
+    """
+    codepoints = range(0x110000)
+    is_word = np.fromiter((chr(cp).isalnum() or cp == 0x5F for cp in codepoints),
+                          dtype=np.bool_, count=0x110000)
+    is_space = np.fromiter((chr(cp).isspace() for cp in codepoints),
+                           dtype=np.bool_, count=0x110000)
+    return is_word, is_space
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _decode_utf8(buf, i):
+        """Decodes the UTF-8 codepoint at buf[i], returning (codepoint, byte width)"""
+        b0 = np.int64(buf[i])
+        if b0 < 0x80:
+            return b0, 1
+        if b0 < 0xE0:
+            return ((b0 & 0x1F) << 6) | (np.int64(buf[i + 1]) & 0x3F), 2
+        if b0 < 0xF0:
+            return (((b0 & 0x0F) << 12) | ((np.int64(buf[i + 1]) & 0x3F) << 6)
+                    | (np.int64(buf[i + 2]) & 0x3F)), 3
+        return (((b0 & 0x07) << 18) | ((np.int64(buf[i + 1]) & 0x3F) << 12)
+                | ((np.int64(buf[i + 2]) & 0x3F) << 6) | (np.int64(buf[i + 3]) & 0x3F)), 4
+
+    @njit(cache=True)
+    def _skip_run(buf, i, end, table, expected):
+        """Skips codepoints while table[codepoint] == expected, returning (index, count)"""
+        count = 0
+        while i < end:
+            cp, width = _decode_utf8(buf, i)
+            if table[cp] != expected:
+                break
+            i += width
+            count += 1
+        return i, count
+
+    @njit(cache=True, parallel=True)
+    def _clean_utf8_batch(offsets, buf, out_buf, out_lengths, is_word, is_space):
+        """
+        Cleans every string of an arrow string array in one pass per tweet
+        
+        Same rules as STRIP_PATTERN + WHITESPACE_PATTERN + strip. Each
+        cleaned tweet is written at its input offset in out_buf (it can only
+        shrink) and its byte length is stored in out_lengths.
+        """
+        for k in prange(len(offsets) - 1):
+            start = offsets[k]
+            end = offsets[k + 1]
+            i = start
+            out = start
+            pending_space = False
+            wrote_any = False
+            
+            while i < end:
+                c = buf[i]
+                
+                # URL: "http" followed by at least one non-whitespace character
+                if (c == 0x68 and i + 4 < end and buf[i + 1] == 0x74
+                        and buf[i + 2] == 0x74 and buf[i + 3] == 0x70):
+                    j, count = _skip_run(buf, i + 4, end, is_space, False)
+                    if count:
+                        i = j
+                        continue
+                
+                # Hashtag or mention: "#" / "@" followed by word characters
+                elif c == 0x23 or c == 0x40:
+                    j, count = _skip_run(buf, i + 1, end, is_word, True)
+                    if count:
+                        i = j
+                        continue
+                
+                cp, width = _decode_utf8(buf, i)
+                if is_space[cp]:
+                    # Collapse whitespace runs; leading/trailing runs are dropped
+                    pending_space = wrote_any
+                else:
+                    if pending_space:
+                        out_buf[out] = 0x20
+                        out += 1
+                        pending_space = False
+                    for t in range(width):
+                        out_buf[out + t] = buf[i + t]
+                    out += width
+                    wrote_any = True
+                i += width
+            
+            out_lengths[k] = out - start
+
+    @njit(cache=True, parallel=True)
+    def _compact_utf8_batch(offsets, out_buf, out_lengths, new_offsets, result):
+        """Copies cleaned tweets from their input offsets into a contiguous buffer"""
+        for k in prange(len(out_lengths)):
+            src = offsets[k]
+            dst = new_offsets[k]
+            for t in range(out_lengths[k]):
+                result[dst + t] = out_buf[src + t]
+
+
+def _clean_tweet_series_numba(texts):
+    """
+    Numba version of clean_tweet_series working on raw arrow string buffers
+    
+    Args:
+        texts (pd.Series): Original tweet texts
+        
+    Returns:
+        pd.Series: Clean texts backed by pyarrow (missing values become empty strings)
+    """
+    arr = pa.array(texts.astype('string[pyarrow]').fillna(""))
+    if isinstance(arr, pa.ChunkedArray):
+        arr = arr.combine_chunks()
+    arr = arr.cast(pa.large_string())
+    
+    num_texts = len(arr)
+    _, offsets_buffer, data_buffer = arr.buffers()
+    offsets = np.frombuffer(offsets_buffer, dtype=np.int64)[arr.offset:arr.offset + num_texts + 1]
+    if data_buffer is None:
+        buf = np.zeros(0, dtype=np.uint8)
+    else:
+        buf = np.frombuffer(data_buffer, dtype=np.uint8)
+    
+    # Clean in place-sized scratch buffer, then pack into arrow layout
+    is_word, is_space = _unicode_class_tables()
+    out_buf = np.empty_like(buf)
+    out_lengths = np.zeros(num_texts, dtype=np.int64)
+    _clean_utf8_batch(offsets, buf, out_buf, out_lengths, is_word, is_space)
+    
+    new_offsets = np.zeros(num_texts + 1, dtype=np.int64)
+    np.cumsum(out_lengths, out=new_offsets[1:])
+    result = np.empty(new_offsets[-1], dtype=np.uint8)
+    _compact_utf8_batch(offsets, out_buf, out_lengths, new_offsets, result)
+    
+    cleaned = pa.LargeStringArray.from_buffers(
+        num_texts, pa.py_buffer(new_offsets), pa.py_buffer(result)
+    )
+    return pd.Series(pd.arrays.ArrowStringArray(cleaned), index=texts.index)
+
+
+def _clean_one_file(file_index):
+    """
+    Loads and cleans a single input file
+    
+    Args:
+        file_index (int): Input file number
+        
+    Returns:
+        pd.DataFrame: Non-empty cleaned tweets, or None if the file is
+        missing, has no TWEET column or fails to load
+        
+    Runs inside worker processes, so errors are reported and swallowed
+    here rather than propagated through the pool.
+    """
+    file_path = os.path.join(INPUT_FOLDER, f"russian_lang_tweets_part{file_index}.csv")
+    
+    # Check file existence
+    if not os.path.exists(file_path):
+        print(f"⚠️  File not found: {file_path}")
+        return None
+    
+    print(f"🔄 Processing file {file_index}/{NUM_INPUT_FILES}: {os.path.basename(file_path)}")
+    
+    try:
+        # Check for TWEET column existence (header only)
+        header = pd.read_csv(file_path, nrows=0).columns
+        if 'TWEET' not in header:
+            print(f"⚠️  No 'TWEET' column found in {file_path}, skipping")
+            return None
+        
+        # Load only the needed columns with the multithreaded pyarrow parser
+        df = pd.read_csv(
+            file_path,
+            usecols=[col for col in KEEP_COLUMNS if col in header],
+            engine='pyarrow',
+            dtype={'TWEET': 'string[pyarrow]'}
+        )
+        
+        # Clean the tweets
+        df['cleaned_tweet'] = clean_tweet_series(df['TWEET'])
+        
+        # Filter empty tweets after cleaning
+        df = df[df['cleaned_tweet'].str.strip() != ""]
+        
+        # Fixed column layout so every file can be appended to the same CSV
+        df = df.reindex(columns=KEEP_COLUMNS + ['cleaned_tweet'])
+        
+        print(f"✅ Cleaned {len(df):,} tweets from file {file_index}")
+        return df
+        
+    except Exception as e:
+        print(f"❌ Error processing file {file_path}: {e}")
+        return None
+
+
+def _clean_files_in_order(executor, file_indices):
+    """
+    Cleans files in worker processes and yields the results in input order
+    
+    Args:
+        executor: Process pool running _clean_one_file
+        file_indices: Input file numbers
+        
+    Yields:
+        Cleaned DataFrame (or None) for each input file, in order
+        
+    Notes:
+        - At most MAX_PENDING_FILES files are submitted ahead of the one being
+          consumed, so a slow file cannot make every later result pile up
+          in memory
+    """
+    file_indices = iter(file_indices)
+    pending = deque()
+    for file_index in file_indices:
+        pending.append(executor.submit(_clean_one_file, file_index))
+        if len(pending) >= MAX_PENDING_FILES:
+            break
+    
+    while pending:
+        df = pending.popleft().result()
+        next_index = next(file_indices, None)
+        if next_index is not None:
+            pending.append(executor.submit(_clean_one_file, next_index))
+        yield df
 
 
 def process_tweet_files():
@@ -66,86 +342,94 @@ def process_tweet_files():
     Processes all Russian tweet files and organizes into clean batch files
     
     Process:
-    1. Iterate through all input files (1-609)
-    2. Clean the tweets
-    3. Filter empty tweets
-    4. Organize into batch files of 50K tweets
+    1. Clean all input files (1-609) in parallel worker processes
+    2. Filter empty tweets
+    3. Organize into batch files of 50K tweets, in input file order
     """
     file_index = 1      # Output file counter
-    buffer = []         # Buffer for storing tweets before saving
-    row_counter = 0     # Row counter in current buffer
+    row_counter = 0     # Rows already written to current batch file
+    writer = None       # Parquet writer of the current batch file
     
     print("🚀 Starting Russian tweet files processing")
     print(f"📁 Input folder: {INPUT_FOLDER}")
     print(f"💾 Output folder: {SCRIPT_FOLDER}")
     print(f"📊 Batch size: {CHUNK_SIZE:,} tweets")
+    print(f"⚙️  Worker processes: {MAX_WORKERS}")
     
-    # Process all input files
-    for i in range(1, NUM_INPUT_FILES + 1):
-        file_path = os.path.join(INPUT_FOLDER, f"russian_lang_tweets_part{i}.csv")
-        
-        # Check file existence
-        if not os.path.exists(file_path):
-            print(f"⚠️  File not found: {file_path}")
-            continue
-        
-        print(f"🔄 Processing file {i}/{NUM_INPUT_FILES}: {os.path.basename(file_path)}")
-        
-        try:
-            # Load the file
-            df = pd.read_csv(file_path)
-            
-            # Check for TWEET column existence
-            if 'TWEET' not in df.columns:
-                print(f"⚠️  No 'TWEET' column found in {file_path}, skipping")
-                continue
-            
-            # Clean the tweets
-            df['cleaned_tweet'] = df['TWEET'].astype(str).apply(clean_tweet)
-            
-            # Filter empty tweets after cleaning
-            df = df[df['cleaned_tweet'].str.strip() != ""]
-            
-            print(f"✅ Cleaned {len(df):,} tweets from file {i}")
+    # Clean files in parallel; results come back in input order so batch
+    # numbering stays deterministic
+    try:
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            cleaned_files = _clean_files_in_order(executor, range(1, NUM_INPUT_FILES + 1))
             
-            # Add to buffer
-            for _, row in df.iterrows():
-                if not row['cleaned_tweet']:  # Additional check for empty tweets
+            for df in cleaned_files:
+                if df is None:
                     continue
-                    
-                buffer.append(row)
-                row_counter += 1
                 
-                # Check if we reached full batch size
-                if row_counter >= CHUNK_SIZE:
-                    _save_batch(buffer, file_index)
-                    buffer = []
-                    row_counter = 0
-                    file_index += 1
+                # Stream rows into batch files, starting a new file when one is full
+                while len(df) > 0:
+                    part = pa.Table.from_pandas(df.iloc[:CHUNK_SIZE - row_counter], preserve_index=False)
+                    if writer is None:
+                        writer = _open_batch(file_index, part.schema)
+                    _save_batch(writer, part)
+                    row_counter += part.num_rows
+                    df = df.iloc[part.num_rows:]
                     
-        except Exception as e:
-            print(f"❌ Error processing file {file_path}: {e}")
-            continue
+                    if row_counter >= CHUNK_SIZE:
+                        writer.close()
+                        writer = None
+                        _report_batch(file_index, row_counter)
+                        file_index += 1
+                        row_counter = 0
+    finally:
+        if writer is not None:
+            writer.close()
     
-    # Save remaining tweets in buffer
-    if buffer:
-        _save_batch(buffer, file_index)
+    # Report the last, partially filled batch file
+    if row_counter:
+        _report_batch(file_index, row_counter)
+    else:
+        file_index -= 1
     
     print(f"🎉 Processing completed! Created {file_index} batch files")
 
 
-def _save_batch(buffer, file_index):
+def _batch_path(file_index):
+    """Returns the output path of a batch file"""
+    return os.path.join(SCRIPT_FOLDER, f"cleaned_tweets_batch{file_index}.parquet")
+
+
+def _open_batch(file_index, schema):
     """
-    Saves batch of tweets to CSV file
+    Starts a new batch Parquet file
     
     Args:
-        buffer (list): List of rows to save
         file_index (int): Output file number
+        schema (pa.Schema): Column layout of the batch
+        
+    Returns:
+        pq.ParquetWriter: Writer to append tweets to the batch file
+    """
+    return pq.ParquetWriter(_batch_path(file_index), schema, compression='snappy')
+
+
+def _save_batch(writer, table):
     """
-    out_df = pd.DataFrame(buffer)
-    out_file = os.path.join(SCRIPT_FOLDER, f"cleaned_tweets_batch{file_index}.csv")
-    out_df.to_csv(out_file, index=False, encoding='utf-8')
-    print(f"💾 Saved {len(out_df):,} tweets to file: {os.path.basename(out_file)}")
+    Appends tweets to the current batch file
+    
+    Args:
+        writer (pq.ParquetWriter): Writer of the current batch file
+        table (pa.Table): Tweets to save
+    """
+    # Input files may infer slightly different types for carried-over columns
+    if not table.schema.equals(writer.schema):
+        table = table.cast(writer.schema)
+    writer.write_table(table)
+
+
+def _report_batch(file_index, row_count):
+    """Prints a summary line for a completed batch file"""
+    print(f"💾 Saved {row_count:,} tweets to file: {os.path.basename(_batch_path(file_index))}")
 
 
 if __name__ == "__main__":
@@ -16,6 +16,8 @@ Date: August 2025
 
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # File output only - no GUI event loop per figure
 import matplotlib.pyplot as plt
 import seaborn as sns
 import plotly.express as px
@@ -86,12 +88,51 @@ class AdvancedEmotionVisualizer:
             'figure.titlesize': 18,
             'font.family': 'DejaVu Sans',
             'axes.grid': True,
-            'grid.alpha': 0.3
+            'grid.alpha': 0.3,
+            'figure.max_open_warning': 0
         })
         
         # Set seaborn palette
         sns.set_palette("husl")
     
+    def _with_categorical_emotions(self, df):
+        """
+        Return df with the 'emotion' column as a categorical.
+        
+        Comparisons, value_counts and groupby then work on small integer codes
+        instead of per-row Python strings. The caller's DataFrame is not modified.
+        
+        Parameters:
+        - df (pd.DataFrame): DataFrame with 'emotion' column
+        
+        Returns:
+        - pd.DataFrame: df itself if already categorical, otherwise a shallow copy
+        """
+        if isinstance(df['emotion'].dtype, pd.CategoricalDtype):
+            return df
+        return df.assign(emotion=df['emotion'].astype('category'))
+    
+    def _top_topics_crosstab(self, df, top_topics):
+        """
+        Count emotions per topic for the given topics only.
+        
+        Filters rows to the top topics before cross-tabulating, instead of
+        building the full emotion x topic table and discarding most columns.
+        
+        Parameters:
+        - df (pd.DataFrame): DataFrame with 'emotion' and 'topic' columns
+        - top_topics (pd.Index): Topics to keep, in display order
+        
+        Returns:
+        - pd.DataFrame: Emotion rows x topic columns of counts
+        """
+        subset = df.loc[df['topic'].isin(top_topics), ['emotion', 'topic']]
+        emotions = pd.Index(df['emotion'].dropna().unique(), name='emotion').sort_values()
+        emotions = emotions.astype(str) if isinstance(emotions, pd.CategoricalIndex) else emotions
+        return (subset.groupby(['emotion', 'topic'], observed=True).size()
+                .unstack(fill_value=0)
+                .reindex(index=emotions, columns=top_topics, fill_value=0))
+    
     def create_emotion_overview_dashboard(self, df):
         """
         Create comprehensive emotion analysis dashboard.
@@ -103,100 +144,192 @@ class AdvancedEmotionVisualizer:
         - str: Path to saved visualization
         """
         print("📊 Creating emotion overview dashboard...")
+        df = self._with_categorical_emotions(df)
         
-        fig, axes = plt.subplots(2, 3, figsize=(20, 12))
-        fig.suptitle('Emotion Analysis Dashboard', fontsize=20, fontweight='bold', y=0.98)
+        # Build at screen dpi, render at 300 dpi only when saving
+        with plt.rc_context({'figure.dpi': 100, 'savefig.dpi': 300}):
+            fig, axes = plt.subplots(2, 3, figsize=(20, 12))
+            fig.suptitle('Emotion Analysis Dashboard', fontsize=20, fontweight='bold', y=0.98)
         
-        # 1. Emotion Distribution (Pie Chart)
-        emotion_counts = df['emotion'].value_counts()
-        colors = [self.emotion_colors.get(emotion, '#808080') for emotion in emotion_counts.index]
+            # Emotion counts (sorted once) and their colors are shared by panels 1-3 and 6
+            emotion_counts = df['emotion'].value_counts(sort=True)
+            emotion_counts = emotion_counts[emotion_counts > 0]  # unused categories
+            colors = [self.emotion_colors.get(emotion, '#808080') for emotion in emotion_counts.index]
         
-        wedges, texts, autotexts = axes[0, 0].pie(
-            emotion_counts.values, 
-            labels=emotion_counts.index,
-            autopct='%1.1f%%',
-            colors=colors,
-            startangle=90
-        )
-        axes[0, 0].set_title('Emotion Distribution', fontweight='bold')
-        
-        # 2. Emotion Bar Chart with counts
-        emotion_counts.plot(kind='bar', ax=axes[0, 1], color=colors)
-        axes[0, 1].set_title('Emotion Frequencies', fontweight='bold')
-        axes[0, 1].tick_params(axis='x', rotation=45)
-        axes[0, 1].set_ylabel('Count')
-        
-        # Add count labels on bars
-        for i, v in enumerate(emotion_counts.values):
-            axes[0, 1].text(i, v + max(emotion_counts.values) * 0.01, f'{v:,}', 
-                           ha='center', va='bottom', fontweight='bold')
-        
-        # 3. Emotion Percentages (Horizontal Bar)
-        emotion_pct = (emotion_counts / len(df) * 100).sort_values()
-        emotion_pct.plot(kind='barh', ax=axes[0, 2], 
-                        color=[self.emotion_colors.get(emotion, '#808080') for emotion in emotion_pct.index])
-        axes[0, 2].set_title('Emotion Percentages', fontweight='bold')
-        axes[0, 2].set_xlabel('Percentage (%)')
-        
-        # 4. Topic Distribution (if available)
-        if 'topic' in df.columns:
-            topic_counts = df['topic'].value_counts().head(10)
-            topic_counts.plot(kind='bar', ax=axes[1, 0], color='lightcoral')
-            axes[1, 0].set_title('Top 10 Topics', fontweight='bold')
-            axes[1, 0].tick_params(axis='x', rotation=45)
-            axes[1, 0].set_ylabel('Count')
-        else:
-            axes[1, 0].text(0.5, 0.5, 'No Topic Data Available', 
-                           ha='center', va='center', transform=axes[1, 0].transAxes)
-        
-        # 5. Emotion-Topic Heatmap (if available)
-        if 'topic' in df.columns:
-            # Create emotion-topic crosstab
-            emotion_topic = pd.crosstab(df['emotion'], df['topic'])
-            top_topics = emotion_topic.sum().nlargest(8).index
-            subset = emotion_topic[top_topics]
+            # 1. Emotion Distribution (Pie Chart)
+            wedges, texts, autotexts = axes[0, 0].pie(
+                emotion_counts.values, 
+                labels=emotion_counts.index,
+                autopct='%1.1f%%',
+                colors=colors,
+                startangle=90
+            )
+            axes[0, 0].set_title('Emotion Distribution', fontweight='bold')
+        
+            # 2. Emotion Bar Chart with counts
+            bars = axes[0, 1].bar(emotion_counts.index.astype(str), emotion_counts.values, color=colors)
+            axes[0, 1].set_title('Emotion Frequencies', fontweight='bold')
+            axes[0, 1].tick_params(axis='x', rotation=45)
+            axes[0, 1].set_ylabel('Count')
+        
+            # Add count labels on bars
+            axes[0, 1].bar_label(bars, fmt='{:,}', padding=3, fontweight='bold')
+        
+            # 3. Emotion Percentages (Horizontal Bar)
+            # Counts are already sorted descending - reverse instead of re-sorting
+            emotion_pct = (emotion_counts / len(df) * 100).iloc[::-1]
+            emotion_pct.plot(kind='barh', ax=axes[0, 2], color=colors[::-1])
+            axes[0, 2].set_title('Emotion Percentages', fontweight='bold')
+            axes[0, 2].set_xlabel('Percentage (%)')
+        
+            # 4. Topic Distribution (if available)
+            if 'topic' in df.columns:
+                topic_counts = df['topic'].value_counts()
+                topic_counts.head(10).plot(kind='bar', ax=axes[1, 0], color='lightcoral')
+                axes[1, 0].set_title('Top 10 Topics', fontweight='bold')
+                axes[1, 0].tick_params(axis='x', rotation=45)
+                axes[1, 0].set_ylabel('Count')
+            else:
+                axes[1, 0].text(0.5, 0.5, 'No Topic Data Available', 
+                               ha='center', va='center', transform=axes[1, 0].transAxes)
+        
+            # 5. Emotion-Topic Heatmap (if available)
+            if 'topic' in df.columns:
+                # Create emotion-topic crosstab
+                subset = self._top_topics_crosstab(df, topic_counts.index[:8])
             
-            sns.heatmap(subset, annot=True, fmt='d', cmap='YlOrRd', 
-                       ax=axes[1, 1], cbar_kws={'label': 'Count'})
-            axes[1, 1].set_title('Emotion-Topic Correlation', fontweight='bold')
-            axes[1, 1].set_xlabel('Topic')
-            axes[1, 1].set_ylabel('Emotion')
-        else:
-            axes[1, 1].text(0.5, 0.5, 'No Topic Data Available', 
-                           ha='center', va='center', transform=axes[1, 1].transAxes)
-        
-        # 6. Emotion Intensity Distribution
-        if 'topic_probability' in df.columns:
-            # Use topic probability as proxy for confidence/intensity
-            for emotion in emotion_counts.head(5).index:
-                emotion_data = df[df['emotion'] == emotion]['topic_probability']
-                if len(emotion_data) > 0:
-                    axes[1, 2].hist(emotion_data, alpha=0.7, label=emotion, bins=20,
-                                   color=self.emotion_colors.get(emotion, '#808080'))
+                sns.heatmap(subset, annot=True, fmt='d', cmap='YlOrRd', 
+                           ax=axes[1, 1], cbar_kws={'label': 'Count'})
+                axes[1, 1].set_title('Emotion-Topic Correlation', fontweight='bold')
+                axes[1, 1].set_xlabel('Topic')
+                axes[1, 1].set_ylabel('Emotion')
+            else:
+                axes[1, 1].text(0.5, 0.5, 'No Topic Data Available', 
+                               ha='center', va='center', transform=axes[1, 1].transAxes)
+        
+            # 6. Emotion Intensity Distribution
+            if 'topic_probability' in df.columns:
+                # Use topic probability as proxy for confidence/intensity
+                # (split by emotion in a single groupby pass, one hist call)
+                probs_by_emotion = {emotion: group.to_numpy()
+                                    for emotion, group in df.groupby('emotion', observed=True)['topic_probability']}
+                top_emotions = [emotion for emotion in emotion_counts.head(5).index
+                                if len(probs_by_emotion.get(emotion, ())) > 0]
+                if top_emotions:
+                    axes[1, 2].hist([probs_by_emotion[emotion] for emotion in top_emotions],
+                                    alpha=0.7, label=top_emotions, bins=20, histtype='stepfilled',
+                                    color=[self.emotion_colors.get(emotion, '#808080') for emotion in top_emotions])
             
-            axes[1, 2].set_title('Emotion Confidence Distribution', fontweight='bold')
-            axes[1, 2].set_xlabel('Confidence Score')
-            axes[1, 2].set_ylabel('Frequency')
-            axes[1, 2].legend()
-        else:
-            # Alternative: emotion frequency by text length
-            if 'text' in df.columns:
-                df['text_length'] = df['text'].str.len()
-                emotion_length = df.groupby('emotion')['text_length'].mean().sort_values(ascending=False)
-                emotion_length.plot(kind='bar', ax=axes[1, 2], 
-                                   color=[self.emotion_colors.get(emotion, '#808080') for emotion in emotion_length.index])
-                axes[1, 2].set_title('Average Text Length by Emotion', fontweight='bold')
-                axes[1, 2].set_ylabel('Average Length (characters)')
-                axes[1, 2].tick_params(axis='x', rotation=45)
-        
-        plt.tight_layout()
-        output_path = self.output_folder / "emotion_overview_dashboard.png"
-        plt.savefig(output_path, dpi=300, bbox_inches='tight', facecolor='white')
-        plt.close()
+                axes[1, 2].set_title('Emotion Confidence Distribution', fontweight='bold')
+                axes[1, 2].set_xlabel('Confidence Score')
+                axes[1, 2].set_ylabel('Frequency')
+                axes[1, 2].legend()
+            else:
+                # Alternative: emotion frequency by text length
+                if 'text' in df.columns:
+                    # Group a temporary length Series instead of adding a column to df
+                    text_len = df['text'].str.len()
+                    emotion_length = (text_len.groupby(df['emotion'], observed=True).mean()
+                                      .sort_values(ascending=False))
+                    emotion_length.plot(kind='bar', ax=axes[1, 2], 
+                                       color=[self.emotion_colors.get(emotion, '#808080') for emotion in emotion_length.index])
+                    axes[1, 2].set_title('Average Text Length by Emotion', fontweight='bold')
+                    axes[1, 2].set_ylabel('Average Length (characters)')
+                    axes[1, 2].tick_params(axis='x', rotation=45)
+        
+            plt.tight_layout()
+            output_path = self.output_folder / "emotion_overview_dashboard.png"
+            plt.savefig(output_path, dpi=300, bbox_inches='tight', facecolor='white')
+            plt.close()
         
         print(f"✅ Emotion dashboard saved: {output_path}")
         return str(output_path)
     
+    def create_interactive_emotion_dashboard(self, df, save_png=False):
+        """
+        Create the emotion overview dashboard as one interactive Plotly figure.
+        
+        Same six panels as create_emotion_overview_dashboard, rendered in the
+        browser instead of rasterizing a 300 dpi matplotlib figure. Data is
+        passed as NumPy arrays, which Plotly serializes as typed arrays.
+        
+        Parameters:
+        - df (pd.DataFrame): DataFrame with 'emotion' column
+        - save_png (bool): Also export a static PNG (requires kaleido)
+        
+        Returns:
+        - str: Path to saved HTML visualization
+        """
+        print("📊 Creating interactive emotion overview dashboard...")
+        df = self._with_categorical_emotions(df)
+        
+        emotion_counts = df['emotion'].value_counts(sort=True)
+        emotion_counts = emotion_counts[emotion_counts > 0]  # unused categories
+        emotions = emotion_counts.index.astype(str).to_numpy()
+        counts = emotion_counts.to_numpy()
+        colors = [self.emotion_colors.get(emotion, '#808080') for emotion in emotions]
+        has_topics = 'topic' in df.columns
+        
+        fig = make_subplots(
+            rows=2, cols=3,
+            specs=[[{'type': 'domain'}, {}, {}], [{}, {}, {}]],
+            subplot_titles=('Emotion Distribution', 'Emotion Frequencies', 'Emotion Percentages',
+                            'Top 10 Topics' if has_topics else 'No Topic Data Available',
+                            'Emotion-Topic Correlation' if has_topics else 'No Topic Data Available',
+                            'Emotion Confidence Distribution' if 'topic_probability' in df.columns
+                            else 'Average Text Length by Emotion')
+        )
+        
+        # 1-3. Emotion distribution, frequencies and percentages
+        fig.add_trace(go.Pie(labels=emotions, values=counts, marker=dict(colors=colors),
+                             sort=False, showlegend=False), row=1, col=1)
+        fig.add_trace(go.Bar(x=emotions, y=counts, marker_color=colors, text=counts,
+                             texttemplate='%{text:,}', showlegend=False), row=1, col=2)
+        fig.add_trace(go.Bar(x=(counts / len(df) * 100)[::-1], y=emotions[::-1], orientation='h',
+                             marker_color=colors[::-1], showlegend=False), row=1, col=3)
+        
+        # 4-5. Topic distribution and emotion-topic heatmap
+        if has_topics:
+            topic_counts = df['topic'].value_counts()
+            top10 = topic_counts.head(10)
+            fig.add_trace(go.Bar(x=top10.index.astype(str).to_numpy(), y=top10.to_numpy(),
+                                 marker_color='lightcoral', showlegend=False), row=2, col=1)
+            
+            subset = self._top_topics_crosstab(df, topic_counts.index[:8])
+            fig.add_trace(go.Heatmap(z=subset.to_numpy(), x=subset.columns.astype(str).to_numpy(),
+                                     y=subset.index.astype(str).to_numpy(), colorscale='YlOrRd',
+                                     texttemplate='%{z}', colorbar=dict(title='Count', x=0.64, len=0.45, y=0.2)),
+                          row=2, col=2)
+        
+        # 6. Emotion confidence distribution (or text length fallback)
+        if 'topic_probability' in df.columns:
+            probs_by_emotion = {emotion: group.to_numpy()
+                                for emotion, group in df.groupby('emotion', observed=True)['topic_probability']}
+            for emotion in emotions[:5]:
+                if len(probs_by_emotion.get(emotion, ())) > 0:
+                    fig.add_trace(go.Histogram(x=probs_by_emotion[emotion], name=emotion, nbinsx=20, opacity=0.7,
+                                               marker_color=self.emotion_colors.get(emotion, '#808080')),
+                                  row=2, col=3)
+            fig.update_layout(barmode='overlay')
+        elif 'text' in df.columns:
+            emotion_length = (df['text'].str.len().groupby(df['emotion'], observed=True).mean()
+                              .sort_values(ascending=False))
+            fig.add_trace(go.Bar(x=emotion_length.index.astype(str).to_numpy(), y=emotion_length.to_numpy(),
+                                 marker_color=[self.emotion_colors.get(emotion, '#808080')
+                                               for emotion in emotion_length.index],
+                                 showlegend=False), row=2, col=3)
+        
+        fig.update_layout(title=dict(text='Emotion Analysis Dashboard', font=dict(size=20)),
+                          width=1800, height=1000, template='plotly_white')
+        
+        output_path = self.output_folder / "emotion_overview_dashboard.html"
+        fig.write_html(output_path, include_plotlyjs='cdn')
+        if save_png:
+            fig.write_image(self.output_folder / "emotion_overview_dashboard_plotly.png", engine='kaleido')
+        
+        print(f"✅ Interactive emotion dashboard saved: {output_path}")
+        return str(output_path)
+    
     def create_temporal_emotion_analysis(self, df, date_column='date'):
         """
         Create temporal analysis of emotions over time.
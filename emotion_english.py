@@ -4,7 +4,7 @@
 Tweet Emotion Analysis System - Stage 3
 =======================================
 
-Input: cleaned_tweets_batch{1-56}.csv files with FEATURE_VALUE column
+Input: cleaned_tweets_batch{1-56}.parquet (or legacy .csv) files with FEATURE_VALUE column
 Output: Same files with emotion column added
 
 Author: [yonatan ori]
@@ -12,11 +12,35 @@ Date: July 2025
 """
 
 import pandas as pd
+import numpy as np
 import os
+import re
+import multiprocessing
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import torch
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pysentimiento import create_analyzer
+from pysentimiento.preprocessing import preprocess_tweet
 from tqdm import tqdm
 import warnings
-from typing import List, Optional
+from typing import Iterator, List, Optional
+
+try:
+    import onnxruntime as ort
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 # Suppress unimportant warnings
 warnings.filterwarnings("ignore")
@@ -26,6 +50,17 @@ INPUT_FOLDER = "/UPDATE/THIS/PATH/"  # UPDATE THIS PATH
 TEXT_COLUMN = "FEATURE_VALUE"       # Text column name for analysis
 EMOTION_COLUMN = "emotion"          # Emotion column name to be added
 FILE_INDICES = list(range(1, 57))  # Files from 1 to 56
+LANGUAGE = "en"                     # Emotion model language
+BATCH_SIZE = 128                    # Texts per model forward pass
+CHUNK_ROWS = 50_000                 # Rows loaded and written at a time per file
+MAX_TOKENS = 128                    # Token limit per text (tweets are short)
+MAX_WORKERS = max(1, (os.cpu_count() or 1) // 2)  # Parallel file processes (CPU only)
+MODEL_MEMORY_GB = 2                 # Approximate RAM per loaded emotion model
+USE_ONNX = True                     # Run int8 ONNX model on CPU when onnxruntime is installed
+ONNX_MODEL_FOLDER = os.path.join(os.path.dirname(os.path.realpath(__file__)), "emotion_onnx")
+
+# Retweet prefix ("RT @user: ") - retweets are analyzed as their original text
+RETWEET_PREFIX = re.compile(r'^RT @\w+:\s*')
 
 # Supported emotions list
 SUPPORTED_EMOTIONS = [
@@ -37,6 +72,78 @@ SUPPORTED_EMOTIONS = [
     'disgust',  # disgust
     'others'    # other
 ]
+SUPPORTED_EMOTIONS_SET = frozenset(SUPPORTED_EMOTIONS)
+
+# Stored emotion column type: int8 codes instead of one Python string per row
+EMOTION_DTYPE = pd.CategoricalDtype(SUPPORTED_EMOTIONS + ['error'])
+OTHERS_CODE = EMOTION_DTYPE.categories.get_loc('others')
+
+# Emotion analyzer owned by each worker process (set by _init_worker)
+_worker_analyzer = None
+
+
+def batch_file_path(folder: str, file_index: int) -> str:
+    """
+    Returns path of a batch file, preferring Parquet over legacy CSV
+    
+    Args:
+        folder: Folder containing the batch files
+        file_index: Batch file number
+        
+    Returns:
+        Path of the .parquet file, or of the .csv file if only that exists
+    """
+    parquet_path = os.path.join(folder, f"cleaned_tweets_batch{file_index}.parquet")
+    if os.path.exists(parquet_path):
+        return parquet_path
+    return os.path.join(folder, f"cleaned_tweets_batch{file_index}.csv")
+
+
+def batch_columns(file_path: str) -> List[str]:
+    """Returns column names of a batch file without loading its data"""
+    if file_path.endswith('.parquet'):
+        return pq.read_schema(file_path).names
+    return pd.read_csv(file_path, nrows=0).columns.tolist()
+
+
+def read_batch(file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Loads a batch file in Parquet or CSV format (by extension)
+    
+    Args:
+        file_path: Batch file path
+        columns: Only load these columns (all columns if None)
+        
+    Returns:
+        Loaded DataFrame
+    """
+    if file_path.endswith('.parquet'):
+        return pd.read_parquet(file_path, columns=columns)
+    return pd.read_csv(file_path, usecols=columns, engine='pyarrow')
+
+
+def iter_batch_chunks(file_path: str, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Streams a batch file in Parquet or CSV format (by extension) in chunks
+    
+    Args:
+        file_path: Batch file path
+        chunk_rows: Maximum rows per chunk
+        
+    Yields:
+        DataFrame chunks in file order
+        
+    Notes:
+        - CSV columns are read as strings: pandas infers dtypes per chunk, and
+          a count column that is numeric in one chunk and "1.2K" in another
+          would not fit the Parquet schema taken from the first chunk
+    """
+    if file_path.endswith('.parquet'):
+        parquet_file = pq.ParquetFile(file_path)
+        for record_batch in parquet_file.iter_batches(batch_size=chunk_rows):
+            yield record_batch.to_pandas()
+    else:
+        yield from pd.read_csv(file_path, chunksize=chunk_rows, dtype=str)
 
 
 def initialize_emotion_analyzer():
@@ -48,11 +155,22 @@ def initialize_emotion_analyzer():
         
     Notes:
         - Uses English-trained model
+        - Moves the model to GPU in FP16 when CUDA is available
+        - Otherwise uses an int8-quantized ONNX copy of the model when
+          onnxruntime is installed (see create_onnx_session)
         - Handles possible initialization issues
     """
     try:
         print("🧠 Initializing pysentimiento emotion analyzer...")
-        analyzer = create_analyzer(task="emotion", lang="en")
+        analyzer = create_analyzer(task="emotion", lang=LANGUAGE)
+        analyzer.model.eval()
+        analyzer.onnx_session = None
+        if torch.cuda.is_available():
+            analyzer.model.half().to("cuda")
+            print("⚡ Emotion model running in FP16 on GPU")
+        elif USE_ONNX and ONNX_AVAILABLE:
+            analyzer.onnx_session = create_onnx_session(analyzer)
+            print("⚡ Emotion model running in int8 ONNX Runtime on CPU")
         print("✅ Emotion analyzer ready successfully")
         return analyzer
     except Exception as e:
@@ -61,6 +179,95 @@ def initialize_emotion_analyzer():
         raise
 
 
+def onnx_model_path() -> str:
+    """Returns path of the saved int8 ONNX emotion model"""
+    return os.path.join(ONNX_MODEL_FOLDER, "model.int8.onnx")
+
+
+def export_onnx_model(analyzer) -> str:
+    """
+    Exports the emotion model to ONNX and quantizes it to int8
+    
+    Args:
+        analyzer: The emotion analyzer whose model is exported
+        
+    Returns:
+        Path of the int8 ONNX model
+        
+    Notes:
+        - Does nothing when the int8 model was already saved
+        - Writes to .tmp paths and renames at the end, so an interrupted
+          export never leaves a truncated model that later runs would load
+    """
+    int8_path = onnx_model_path()
+    if os.path.exists(int8_path):
+        return int8_path
+    
+    print("📦 Exporting emotion model to ONNX and quantizing to int8...")
+    os.makedirs(ONNX_MODEL_FOLDER, exist_ok=True)
+    fp32_tmp_path = os.path.join(ONNX_MODEL_FOLDER, "model.onnx.tmp")
+    int8_tmp_path = int8_path + ".tmp"
+    try:
+        sample = analyzer.tokenizer(["sample tweet"], return_tensors="pt")
+        torch.onnx.export(
+            analyzer.model,
+            (sample["input_ids"], sample["attention_mask"]),
+            fp32_tmp_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={"input_ids": {0: "batch", 1: "sequence"},
+                          "attention_mask": {0: "batch", 1: "sequence"},
+                          "logits": {0: "batch"}},
+            opset_version=14,
+        )
+        quantize_dynamic(fp32_tmp_path, int8_tmp_path, weight_type=QuantType.QInt8)
+        os.replace(int8_tmp_path, int8_path)
+    finally:
+        for tmp_path in (fp32_tmp_path, int8_tmp_path):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return int8_path
+
+
+def prepare_onnx_model() -> None:
+    """
+    Exports the int8 ONNX model once before worker processes start
+    
+    Notes:
+        - Workers then only load the saved model instead of all exporting
+          to the same files at once
+    """
+    if torch.cuda.is_available() or not (USE_ONNX and ONNX_AVAILABLE):
+        return
+    if os.path.exists(onnx_model_path()):
+        return
+    analyzer = create_analyzer(task="emotion", lang=LANGUAGE)
+    analyzer.model.eval()
+    export_onnx_model(analyzer)
+    del analyzer
+
+
+def create_onnx_session(analyzer):
+    """
+    Creates an ONNX Runtime session for the int8-quantized emotion model
+    
+    Args:
+        analyzer: The emotion analyzer whose model is exported
+        
+    Returns:
+        onnxruntime.InferenceSession running on CPU
+        
+    Notes:
+        - Exports and quantizes the model once into ONNX_MODEL_FOLDER,
+          later runs reuse the saved int8 model
+        - Uses as many threads as torch (split between worker processes)
+    """
+    int8_path = export_onnx_model(analyzer)
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = torch.get_num_threads()
+    return ort.InferenceSession(int8_path, options, providers=["CPUExecutionProvider"])
+
+
 def analyze_text_emotion(analyzer, text: str) -> str:
     """
     Analyzes emotion of single text
@@ -82,10 +289,10 @@ def analyze_text_emotion(analyzer, text: str) -> str:
         
         # Analyze emotion
         result = analyzer.predict(clean_text)
-        emotion = result.output.lower()
+        emotion = result.output  # model labels are already lowercase
         
         # Validate detected emotion
-        if emotion in SUPPORTED_EMOTIONS:
+        if emotion in SUPPORTED_EMOTIONS_SET:
             return emotion
         else:
             return "others"
@@ -95,19 +302,133 @@ def analyze_text_emotion(analyzer, text: str) -> str:
         return "error"
 
 
-def analyze_file_emotions(file_index: int) -> None:
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, cache=True)
+    def _logits_to_codes(logits, label_codes, out):
+        """Writes label_codes[argmax(logits[i])] to out[i] for every row in parallel"""
+        for i in prange(logits.shape[0]):
+            best = 0
+            best_value = logits[i, 0]
+            for j in range(1, logits.shape[1]):
+                if logits[i, j] > best_value:
+                    best_value = logits[i, j]
+                    best = j
+            out[i] = label_codes[best]
+
+
+def logits_to_codes(logits: np.ndarray, label_codes: np.ndarray) -> np.ndarray:
+    """
+    Maps a batch of logits to emotion category codes
+    
+    Args:
+        logits: (batch, num_labels) model outputs
+        label_codes: EMOTION_DTYPE code for each model label id
+        
+    Returns:
+        int8 array of EMOTION_DTYPE codes, one per row
+    """
+    if NUMBA_AVAILABLE:
+        out = np.empty(logits.shape[0], dtype=np.int8)
+        _logits_to_codes(np.ascontiguousarray(logits), label_codes, out)
+        return out
+    return label_codes[logits.argmax(-1)]
+
+
+def analyze_texts_emotion_codes(analyzer, texts: List[str]) -> np.ndarray:
+    """
+    Analyzes emotions of many texts in batches
+    
+    Args:
+        analyzer: The emotion analyzer
+        texts: Texts for analysis
+        
+    Returns:
+        int8 array of EMOTION_DTYPE codes in input order ('others' for empty
+        texts, 'error' for texts that could not be analyzed)
+        
+    Notes:
+        - Runs one padded forward pass per BATCH_SIZE texts instead of one per text
+        - Applies the same tweet preprocessing as analyzer.predict
+        - Runs the int8 ONNX session instead of torch when one is loaded
+        - Turns ONNX logits into codes with a Numba kernel when available
+          (torch logits are reduced with argmax on the model's device)
+    """
+    model = analyzer.model
+    device = next(model.parameters()).device
+    onnx_session = getattr(analyzer, "onnx_session", None)
+    preprocessing_args = getattr(analyzer, "preprocessing_args", {})
+    
+    # Model label ids -> supported emotion codes
+    id2label = model.config.id2label
+    label_codes = np.array([EMOTION_DTYPE.categories.get_loc(id2label[i])
+                            if id2label[i] in SUPPORTED_EMOTIONS_SET else OTHERS_CODE
+                            for i in range(len(id2label))], dtype=np.int8)
+    
+    codes = np.full(len(texts), OTHERS_CODE, dtype=np.int8)
+    clean_texts = [str(text).strip() for text in texts]
+    todo = [i for i, text in enumerate(clean_texts) if text]
+    
+    for start in tqdm(range(0, len(todo), BATCH_SIZE), desc="🔍 Analyzing emotion batches"):
+        batch_indices = todo[start:start + BATCH_SIZE]
+        try:
+            batch = [preprocess_tweet(clean_texts[i], lang=LANGUAGE, **preprocessing_args)
+                     for i in batch_indices]
+            if onnx_session is not None:
+                inputs = analyzer.tokenizer(batch, padding=True, truncation=True,
+                                            max_length=MAX_TOKENS, return_tensors="np")
+                logits = onnx_session.run(["logits"], {
+                    "input_ids": inputs["input_ids"].astype(np.int64),
+                    "attention_mask": inputs["attention_mask"].astype(np.int64),
+                })[0]
+                codes[batch_indices] = logits_to_codes(logits, label_codes)
+            else:
+                inputs = analyzer.tokenizer(batch, padding=True, truncation=True,
+                                            max_length=MAX_TOKENS, return_tensors="pt").to(device)
+                with torch.inference_mode():
+                    label_ids = model(**inputs).logits.argmax(-1).cpu().numpy()
+                codes[batch_indices] = label_codes[label_ids]
+        except Exception as e:
+            # Fall back to single-text analysis to isolate the failing text
+            print(f"⚠️  Error analyzing batch, retrying per text: {e}")
+            for i in batch_indices:
+                emotion = analyze_text_emotion(analyzer, clean_texts[i])
+                codes[i] = EMOTION_DTYPE.categories.get_loc(emotion)
+    
+    return codes
+
+
+def analyze_texts_emotions(analyzer, texts: List[str]) -> List[str]:
+    """
+    Analyzes emotions of many texts in batches
+    
+    Args:
+        analyzer: The emotion analyzer
+        texts: Texts for analysis
+        
+    Returns:
+        Detected emotions in input order (see analyze_texts_emotion_codes)
+    """
+    codes = analyze_texts_emotion_codes(analyzer, texts)
+    return EMOTION_DTYPE.categories[codes].tolist()
+
+
+def analyze_file_emotions(file_index: int, analyzer) -> None:
     """
     Analyzes emotions in single file
     
     Args:
         file_index: File number to process
+        analyzer: The emotion analyzer (loaded once and shared by all files)
         
     Notes:
-        - Loads file, analyzes emotions and saves in place
+        - Streams the file in CHUNK_ROWS chunks, analyzes emotions and appends
+          each chunk to a Parquet output (written to a .tmp file and renamed
+          over the input, or next to a legacy CSV input, which is left untouched)
         - Shows progress bar for each file
-        - Skips files that already have emotion analysis
+        - Only analyzes rows without an emotion yet, so interrupted or
+          partially analyzed files resume where they stopped
     """
-    file_path = os.path.join(INPUT_FOLDER, f"cleaned_tweets_batch{file_index}.csv")
+    file_path = batch_file_path(INPUT_FOLDER, file_index)
     
     # Check file existence
     if not os.path.exists(file_path):
@@ -117,47 +438,82 @@ def analyze_file_emotions(file_index: int) -> None:
     print(f"📄 Processing file {file_index}: {os.path.basename(file_path)}")
     
     try:
-        # Load the file
-        df = pd.read_csv(file_path)
-        
-        # Check for text column for analysis existence
-        if TEXT_COLUMN not in df.columns:
+        # Check for text column for analysis existence (schema only)
+        columns = batch_columns(file_path)
+        if TEXT_COLUMN not in columns:
             print(f"⚠️  Column '{TEXT_COLUMN}' missing in file {file_index}, skipping")
             return
         
-        # Check if emotion analysis already exists
-        if EMOTION_COLUMN in df.columns and not df[EMOTION_COLUMN].isna().all():
-            print(f"ℹ️  File {file_index} already analyzed, skipping")
-            return
+        # Check if emotion analysis is already complete (emotion column only)
+        if EMOTION_COLUMN in columns:
+            existing = read_batch(file_path, columns=[EMOTION_COLUMN])
+            if not existing[EMOTION_COLUMN].isna().any():
+                print(f"ℹ️  File {file_index} already analyzed, skipping")
+                return
         
-        # Prepare text list for analysis
-        texts = df[TEXT_COLUMN].fillna("").astype(str).tolist()
-        total_texts = len(texts)
+        output_path = os.path.splitext(file_path)[0] + '.parquet'
+        tmp_path = output_path + '.tmp'
+        emotion_counts = Counter()
+        known_codes = {}  # text key -> emotion code, shared by all chunks of the file
+        total_texts = 0
+        writer = None
+        
+        try:
+            # Stream the file chunk by chunk so only one chunk is in memory
+            for chunk in iter_batch_chunks(file_path):
+                # Rows still missing an emotion
+                if EMOTION_COLUMN not in chunk:
+                    chunk[EMOTION_COLUMN] = pd.Series(None, index=chunk.index, dtype=object)
+                todo = chunk[EMOTION_COLUMN].isna().to_numpy()
+                texts = chunk.loc[todo, TEXT_COLUMN].fillna("").astype(str).tolist()
+                
+                # Analyze each distinct text once (retweets and copies repeat texts)
+                keys = [RETWEET_PREFIX.sub("", text).strip() for text in texts]
+                text_codes, unique_texts = pd.factorize(pd.Series(keys, dtype=object))
+                new_texts = [text for text in unique_texts if text not in known_codes]
+                
+                print(f"🎭 Analyzing emotions in {len(texts):,} of {len(chunk):,} texts "
+                      f"({len(new_texts):,} new unique)...")
+                
+                # Batched emotion analysis with progress bar
+                known_codes.update(zip(new_texts, analyze_texts_emotion_codes(analyzer, new_texts)))
+                unique_codes = np.array([known_codes[text] for text in unique_texts], dtype=np.int8)
+                
+                # Update chunk codes in place and append it to the output
+                codes = pd.Categorical(chunk[EMOTION_COLUMN], dtype=EMOTION_DTYPE).codes.copy()
+                codes[todo] = unique_codes[text_codes]
+                chunk[EMOTION_COLUMN] = pd.Categorical.from_codes(codes, dtype=EMOTION_DTYPE)
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    # All-missing columns in the first chunk come out as null type
+                    schema = pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type)
+                                        else field for field in table.schema],
+                                       metadata=table.schema.metadata)
+                    writer = pq.ParquetWriter(tmp_path, schema, compression='zstd')
+                writer.write_table(table.cast(writer.schema))
+                
+                emotion_counts.update(chunk[EMOTION_COLUMN].value_counts().to_dict())
+                total_texts += len(chunk)
+                del chunk, table
+        finally:
+            if writer is not None:
+                writer.close()
         
         if total_texts == 0:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
             print(f"⚠️  No texts for analysis in file {file_index}")
             return
         
-        print(f"🎭 Analyzing emotions in {total_texts:,} texts...")
-        
-        # Initialize emotion analyzer
-        analyzer = initialize_emotion_analyzer()
-        
-        # Emotion analysis with progress bar
-        emotions = []
-        for text in tqdm(texts, desc=f"🔍 Analyzing emotions batch {file_index}"):
-            emotion = analyze_text_emotion(analyzer, text)
-            emotions.append(emotion)
-        
-        # Update DataFrame and save
-        df[EMOTION_COLUMN] = emotions
-        df.to_csv(file_path, index=False, encoding='utf-8')
+        # Replace the output only once it is complete
+        os.replace(tmp_path, output_path)
         
         # Show statistics
-        emotion_counts = pd.Series(emotions).value_counts()
         print(f"✅ File {file_index} completed!")
         print("📊 Emotion distribution:")
-        for emotion, count in emotion_counts.items():
+        for emotion, count in emotion_counts.most_common():
+            if not count:
+                continue
             percentage = (count / total_texts) * 100
             print(f"   {emotion}: {count:,} ({percentage:.1f}%)")
         
@@ -165,6 +521,41 @@ def analyze_file_emotions(file_index: int) -> None:
         print(f"❌ Error processing file {file_index}: {e}")
 
 
+def _resolve_num_workers() -> int:
+    """
+    Chooses how many files to process in parallel
+    
+    Returns:
+        Number of worker processes, capped by MAX_WORKERS and available RAM
+        
+    Notes:
+        - Uses a single process on GPU, where one model already saturates the device
+        - Falls back to the CPU-based MAX_WORKERS where RAM size is unknown
+          (os.sysconf is POSIX only, e.g. missing on Windows)
+    """
+    if torch.cuda.is_available():
+        return 1
+    
+    try:
+        total_ram_gb = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / 1024 ** 3
+    except (AttributeError, ValueError, OSError):
+        return MAX_WORKERS
+    return max(1, min(MAX_WORKERS, int(total_ram_gb // MODEL_MEMORY_GB)))
+
+
+def _init_worker(num_threads: int) -> None:
+    """Loads a private emotion analyzer inside a worker process"""
+    global _worker_analyzer
+    # Split CPU cores between workers instead of every worker using all of them
+    torch.set_num_threads(num_threads)
+    _worker_analyzer = initialize_emotion_analyzer()
+
+
+def _analyze_file_in_worker(file_index: int) -> None:
+    """Analyzes one file with the worker's own analyzer"""
+    analyze_file_emotions(file_index, _worker_analyzer)
+
+
 def analyze_all_files():
     """
     Analyzes emotions in all files
@@ -174,11 +565,30 @@ def analyze_all_files():
     print(f"📊 Number of files: {len(FILE_INDICES)}")
     print(f"🎭 Supported emotions: {', '.join(SUPPORTED_EMOTIONS)}")
     
+    num_workers = _resolve_num_workers()
+    print(f"⚙️  Using {num_workers} parallel processes")
+    
     try:
-        # Process all files
-        for i, file_index in enumerate(FILE_INDICES, 1):
-            print(f"\n--- Processing file {i}/{len(FILE_INDICES)} ---")
-            analyze_file_emotions(file_index)
+        if num_workers > 1:
+            # Export the ONNX model here so workers only load it
+            prepare_onnx_model()
+            
+            # One analyzer per worker; spawn avoids forking torch state
+            threads_per_worker = max(1, (os.cpu_count() or 1) // num_workers)
+            with ProcessPoolExecutor(max_workers=num_workers,
+                                     mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_init_worker,
+                                     initargs=(threads_per_worker,)) as executor:
+                list(tqdm(executor.map(_analyze_file_in_worker, FILE_INDICES),
+                          total=len(FILE_INDICES), desc="📁 Files"))
+        else:
+            # Load the model once for all files
+            analyzer = initialize_emotion_analyzer()
+            
+            # Process all files
+            for i, file_index in enumerate(FILE_INDICES, 1):
+                print(f"\n--- Processing file {i}/{len(FILE_INDICES)} ---")
+                analyze_file_emotions(file_index, analyzer)
         
         print("\n🎉 Emotion analysis completed successfully!")
         
@@ -195,30 +605,52 @@ def analyze_all_files():
 def print_emotion_summary():
     """
     Shows general summary of emotions across all files
+    
+    Notes:
+        - Reads only the emotion column, scanning all Parquet files in a
+          single PyArrow dataset pass (legacy CSV files are read one by one)
     """
     print("\n📈 General emotion summary:")
     
-    total_emotions = {emotion: 0 for emotion in SUPPORTED_EMOTIONS}
-    total_texts = 0
-    processed_files = 0
-    
-    # Collect data from all files
+    # Find files that already have emotion analysis (schema only)
+    parquet_files = []
+    csv_files = []
     for file_index in FILE_INDICES:
-        file_path = os.path.join(INPUT_FOLDER, f"cleaned_tweets_batch{file_index}.csv")
+        file_path = batch_file_path(INPUT_FOLDER, file_index)
         
         if os.path.exists(file_path):
             try:
-                df = pd.read_csv(file_path)
-                if EMOTION_COLUMN in df.columns:
-                    emotion_counts = df[EMOTION_COLUMN].value_counts()
-                    for emotion, count in emotion_counts.items():
-                        if emotion in total_emotions:
-                            total_emotions[emotion] += count
-                    total_texts += len(df)
-                    processed_files += 1
+                if EMOTION_COLUMN in batch_columns(file_path):
+                    if file_path.endswith('.parquet'):
+                        parquet_files.append(file_path)
+                    else:
+                        csv_files.append(file_path)
             except Exception as e:
                 print(f"⚠️  Error reading file {file_index}: {e}")
     
+    total_emotions = Counter()
+    total_texts = 0
+    
+    # Collect data from all files
+    try:
+        if parquet_files:
+            dataset = ds.dataset(parquet_files, format='parquet',
+                                 schema=pa.schema([(EMOTION_COLUMN, pa.string())]))
+            table = dataset.to_table(columns=[EMOTION_COLUMN])
+            for item in pc.value_counts(table.column(EMOTION_COLUMN)).to_pylist():
+                total_emotions[item['values']] += item['counts']
+            total_texts += table.num_rows
+        
+        for file_path in csv_files:
+            df = read_batch(file_path, columns=[EMOTION_COLUMN])
+            total_emotions.update(df[EMOTION_COLUMN].value_counts().to_dict())
+            total_texts += len(df)
+    except Exception as e:
+        print(f"⚠️  Error reading emotion data: {e}")
+        return
+    
+    processed_files = len(parquet_files) + len(csv_files)
+    
     # Show results
     if total_texts > 0:
         print(f"📁 Processed files: {processed_files}/{len(FILE_INDICES)}")
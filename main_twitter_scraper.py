@@ -13,11 +13,193 @@ Author: Jonathan Uri
 Date: December 2024
 """
 
+import csv
+import os
 import time
+from multiprocessing import Pool, util
+from urllib.parse import urlencode
 import pandas as pd
-from WebDriverSetup import setup_web_driver
+import pyarrow as pa
+import pyarrow.parquet as pq
+from WebDriverSetup import get_driver, quit_driver, setup_web_driver
 from SearchScrapper import SearchScrapper
-from SearchScrapperDetails import SearchScrapperDetails
+from SearchScrapperDetails import SearchScrapperDetails, WebDriverPool
+
+# Output columns for scraped tweets (hashtag and user timeline modes)
+TWEET_COLUMNS = (
+    'id', 'text', 'username', 'fullname', 'url', 'publication_date', 'photo_url',
+    'photo_preview_image_url', 'photo_alt_text', 'video_url', 'video_preview_image_url',
+    'video_alt_text', 'animated_gif_url', 'animated_gif_preview_image_url', 'animated_gif_alt_text',
+    'replies', 'retweets', 'quotes', 'likes', 'hashtags', 'views', 'target'
+)
+
+# Output columns for follower/following relationships
+FOLLOW_COLUMNS = ('target_username', 'other_username', 'type')
+
+# Output schemas - every scraped field is text, except the list of hashtags
+TWEET_SCHEMA = pa.schema([
+    (name, pa.list_(pa.string()) if name == 'hashtags' else pa.string())
+    for name in TWEET_COLUMNS
+])
+FOLLOW_SCHEMA = pa.schema([(name, pa.string()) for name in FOLLOW_COLUMNS])
+
+SEARCH_URL = 'https://x.com/search?'
+
+# Parallel browser sessions for network scraping (side=3). A WebDriver can only
+# load one page at a time, so each extra session is another logged-in browser.
+NETWORK_WORKERS = 3
+
+def build_search_url(query):
+    """
+    Builds a live (latest tweets) X search URL for a search query.
+
+    Parameters:
+    - query (str): Search query, e.g. '(#hashtag) until:2023-12-02 since:2023-11-25'
+
+    Returns:
+    - str: URL with the query encoded
+    """
+    return SEARCH_URL + urlencode({'q': query, 'src': 'typed_query', 'f': 'live'})
+
+def tweet_rows(scraped_tweets, target):
+    """
+    Formats scraped tweets as rows matching TWEET_COLUMNS.
+
+    Parameters:
+    - scraped_tweets (iterable): Tweet objects returned by SearchScrapper
+    - target (str): Hashtag or username the tweets were scraped for
+
+    Yields:
+    - tuple: One row per tweet
+    """
+    for tweet in scraped_tweets:
+        yield (
+            tweet.ID, tweet.content, tweet.author, tweet.fullName, tweet.url, tweet.timestamp,
+            tweet.image_url, None, None, tweet.video_url, tweet.video_preview_image_url,
+            None, None, None, None, tweet.comments, tweet.retweets, None, tweet.likes,
+            list(tweet.hashtags), tweet.views, target
+        )
+
+def scrape_one(query):
+    """
+    Scrapes one search query in a worker process, with its own logged-in browser.
+
+    The browser is created on the worker's first query and reused for the
+    following ones (see init_scrape_worker for cleanup).
+
+    Parameters:
+    - query (tuple): (search URL, hashtag or username, maximum tweets)
+
+    Returns:
+    - tuple: (hashtag or username, set[Tweet])
+    """
+    search_url, target, max_tweets = query
+    print(f"👷 Worker {os.getpid()} scraping: {target}")
+    return target, SearchScrapper(get_driver()).scrape_twitter_query(search_url, target, max_tweets)
+
+def init_scrape_worker():
+    """Quits the worker's shared browser when the worker process exits"""
+    util.Finalize(None, quit_driver, exitpriority=10)
+
+def scrape_queries(driver, queries, workers=1):
+    """
+    Scrapes search queries one after another, or in parallel browser processes.
+
+    Scraping is bound by page loads and scroll waits, not CPU, so separate
+    processes with their own browser scale almost linearly.
+
+    Parameters:
+    - driver (webdriver.Chrome): Logged-in WebDriver, used when workers is 1 (may be None otherwise)
+    - queries (list): (search URL, hashtag or username, maximum tweets) tuples
+    - workers (int): Number of worker processes
+
+    Yields:
+    - tuple: (hashtag or username, set[Tweet]); in completion order with workers > 1
+    """
+    if workers <= 1:
+        scraper = SearchScrapper(driver)
+        for search_url, target, max_tweets in queries:
+            yield target, scraper.scrape_twitter_query(search_url, target, max_tweets)
+        return
+
+    with Pool(processes=workers, initializer=init_scrape_worker) as pool:
+        yield from pool.imap_unordered(scrape_one, queries)
+        # Let the workers exit normally, quitting their browsers, before the
+        # pool is terminated
+        pool.close()
+        pool.join()
+
+class ScrapeOutputWriter:
+    """
+    Streams scraped rows to CSV and Parquet output files as they are scraped.
+
+    Each row goes straight to the CSV file, without building a DataFrame, so
+    memory use stays constant over long runs and rows written before a crash
+    are kept. Parquet rows are buffered and written PARQUET_BATCH_ROWS at a
+    time to avoid tiny row groups. List columns are stored natively in
+    Parquet and as their Python text form in the CSV (as pandas wrote them).
+
+    Input: Row tuples matching the schema
+    Output: <output_stem>.csv and <output_stem>.parquet
+    """
+
+    PARQUET_BATCH_ROWS = 1000
+
+    def __init__(self, output_stem, schema):
+        """
+        Open both output files.
+
+        Parameters:
+        - output_stem (str): Output path without extension
+        - schema (pa.Schema): Column names and types of the rows
+        """
+        self.schema = schema
+        self.parquet_file = f"{output_stem}.parquet"
+        self.csv_file = f"{output_stem}.csv"
+        self.parquet_writer = pq.ParquetWriter(self.parquet_file, schema, compression='zstd')
+        self.csv_handle = open(self.csv_file, 'w', newline='', encoding='utf-8')
+        self.csv_writer = csv.writer(self.csv_handle)
+        self.csv_writer.writerow(schema.names)
+        self.pending_rows = []
+        self.rows_written = 0
+
+    def write_rows(self, rows):
+        """
+        Append rows to both output files.
+
+        Parameters:
+        - rows (iterable): Tuples with one value per schema column
+        """
+        for row in rows:
+            self.csv_writer.writerow(row)
+            self.pending_rows.append(row)
+            self.rows_written += 1
+            if len(self.pending_rows) >= self.PARQUET_BATCH_ROWS:
+                self._flush_parquet()
+        self.csv_handle.flush()
+
+    def _flush_parquet(self):
+        """Write buffered rows to the Parquet file as one row group."""
+        if not self.pending_rows:
+            return
+        arrays = [
+            pa.array(values, type=field.type)
+            for values, field in zip(zip(*self.pending_rows), self.schema)
+        ]
+        self.parquet_writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        self.pending_rows = []
+
+    def close(self):
+        """Flush and close both output files."""
+        self._flush_parquet()
+        self.parquet_writer.close()
+        self.csv_handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
 def read_users_from_excel(file_path, column_name):
     """
@@ -54,7 +236,7 @@ def read_users_from_excel(file_path, column_name):
         print(f"Error reading Excel file: {e}")
         return []
 
-def main(side, excel_file_path=None, username_column=None):
+def main(side, excel_file_path=None, username_column=None, workers=1):
     """
     Main entry point for Twitter scraping operations.
 
@@ -65,12 +247,15 @@ def main(side, excel_file_path=None, username_column=None):
         - 3: Scrape following/followers/verified followers of users
     - excel_file_path (str): Path to Excel file containing usernames (for side=3)
     - username_column (str): Name of column containing usernames in Excel file (for side=3)
+    - workers (int): Browser processes scraping queries in parallel (for side=0 and side=1)
     
     Input: Configuration parameters and Excel files
     Output: CSV files with scraped Twitter data
     """
     start_time = time.time()
-    driver = setup_web_driver()
+    # Parallel query workers log in on their own, so only log in here when
+    # this process scrapes itself
+    driver = get_driver() if side == 3 or workers <= 1 else None
 
     if side == 0:
         # Hashtag-based tweet scraping
@@ -80,39 +265,24 @@ def main(side, excel_file_path=None, username_column=None):
         hashtags = ['hamas']  # Replace or extend this list with relevant hashtags
         start_date = "2023-11-25"
         end_date = "2023-12-02"
-        all_tweets = []
+        output_stem = f"{start_date}_to_{end_date}_hashtag_tweets"
 
         print(f"🔍 Scraping tweets for hashtags: {hashtags}")
         print(f"📅 Date range: {start_date} to {end_date}")
 
-        for hashtag in hashtags:
-            search_query = f'https://x.com/search?q=%28%23{hashtag}%29+until%3A{end_date}+since%3A{start_date}&src=typed_query&f=live'
-            scraped_tweets = SearchScrapper(driver).scrape_twitter_query(search_query, hashtag, max_tweets=50)
-
-            # Process and format tweet data
-            tweets_data = [
-                (
-                    tweet.ID, tweet.content, tweet.author, tweet.fullName, tweet.url, tweet.timestamp,
-                    tweet.image_url, None, None, tweet.video_url, tweet.video_preview_image_url,
-                    None, None, None, None, tweet.comments, tweet.retweets, None, tweet.likes,
-                    tweet.hashtags, tweet.views, hashtag
-                )
-                for tweet in scraped_tweets
-            ]
-            all_tweets.extend(tweets_data)
-
-        # Save hashtag scraping results
-        columns = [
-            'id', 'text', 'username', 'fullname', 'url', 'publication_date', 'photo_url',
-            'photo_preview_image_url', 'photo_alt_text', 'video_url', 'video_preview_image_url',
-            'video_alt_text', 'animated_gif_url', 'animated_gif_preview_image_url', 'animated_gif_alt_text',
-            'replies', 'retweets', 'quotes', 'likes', 'hashtags', 'views', 'target'
+        queries = [
+            (build_search_url(f'(#{hashtag}) until:{end_date} since:{start_date}'), hashtag, 50)
+            for hashtag in hashtags
         ]
-        df = pd.DataFrame(all_tweets, columns=columns)
-        output_file = f"{start_date}_to_{end_date}_hashtag_tweets.csv"
-        df.to_csv(output_file, index=False)
-        print(f"✅ Hashtag data saved to {output_file}")
-        print(f"📊 Total tweets scraped: {len(all_tweets)}")
+
+        # Save hashtag scraping results as each hashtag completes
+        with ScrapeOutputWriter(output_stem, TWEET_SCHEMA) as writer:
+            for hashtag, scraped_tweets in scrape_queries(driver, queries, workers):
+                # Process and format tweet data
+                writer.write_rows(tweet_rows(scraped_tweets, hashtag))
+
+        print(f"✅ Hashtag data saved to {writer.csv_file} and {writer.parquet_file}")
+        print(f"📊 Total tweets scraped: {writer.rows_written}")
 
     elif side == 1:
         # User timeline scraping
@@ -122,40 +292,24 @@ def main(side, excel_file_path=None, username_column=None):
         users = read_users_from_excel(excel_file_path, username_column)
         start_date = "2023-09-25"
         end_date = "2025-01-01"
-        all_tweets = []
+        output_stem = f"{start_date}_to_{end_date}_user_tweets"
 
         print(f"👤 Scraping tweets from {len(users)} users")
         print(f"📅 Date range: {start_date} to {end_date}")
 
-        for user in users:
-            print(f"🔄 Processing user: @{user}")
-            search_query = f'https://x.com/search?q=%28from%3A{user}%29+until%3A{end_date}+since%3A{start_date}&src=typed_query&f=live'
-            scraped_tweets = SearchScrapper(driver).scrape_twitter_query(search_query, user, max_tweets=100)
-
-            tweets_data = [
-                (
-                    tweet.ID, tweet.content, tweet.author, tweet.fullName, tweet.url, tweet.timestamp,
-                    tweet.image_url, None, None, tweet.video_url, tweet.video_preview_image_url,
-                    None, None, None, None, tweet.comments, tweet.retweets, None, tweet.likes,
-                    tweet.hashtags, tweet.views, user
-                )
-                for tweet in scraped_tweets
-            ]
-            all_tweets.extend(tweets_data)
-            print(f"   📝 Found {len(tweets_data)} tweets for @{user}")
-
-        # Save user timeline results
-        columns = [
-            'id', 'text', 'username', 'fullname', 'url', 'publication_date', 'photo_url',
-            'photo_preview_image_url', 'photo_alt_text', 'video_url', 'video_preview_image_url',
-            'video_alt_text', 'animated_gif_url', 'animated_gif_preview_image_url', 'animated_gif_alt_text',
-            'replies', 'retweets', 'quotes', 'likes', 'hashtags', 'views', 'target'
+        queries = [
+            (build_search_url(f'(from:{user}) until:{end_date} since:{start_date}'), user, 100)
+            for user in users
         ]
-        df = pd.DataFrame(all_tweets, columns=columns)
-        output_file = f"{start_date}_to_{end_date}_user_tweets.csv"
-        df.to_csv(output_file, index=False)
-        print(f"✅ User timeline data saved to {output_file}")
-        print(f"📊 Total tweets scraped: {len(all_tweets)}")
+
+        # Save user timeline results as each user completes
+        with ScrapeOutputWriter(output_stem, TWEET_SCHEMA) as writer:
+            for user, scraped_tweets in scrape_queries(driver, queries, workers):
+                writer.write_rows(tweet_rows(scraped_tweets, user))
+                print(f"   📝 Found {len(scraped_tweets)} tweets for @{user}")
+
+        print(f"✅ User timeline data saved to {writer.csv_file} and {writer.parquet_file}")
+        print(f"📊 Total tweets scraped: {writer.rows_written}")
 
     elif side == 3:
         # User network scraping (followers/following)
@@ -174,45 +328,36 @@ def main(side, excel_file_path=None, username_column=None):
             return
 
         print(f"🌐 Scraping network data for {len(users_follows)} users")
-        
-        all_follows = []
-        follow_types = [
-            ("following", "https://x.com/{}/following"),
-            ("followers", "https://x.com/{}/followers"),
-            ("verified_followers", "https://x.com/{}/verified_followers")
-        ]
-
-        for target in users_follows:
-            print(f"🔄 Processing user network: @{target}")
-            for follow_type, url_template in follow_types:
-                print(f"   📊 Scraping {follow_type}...")
-                url = url_template.format(target)
-                scraped_users = SearchScrapperDetails(driver).scrape_following_page(url, max_users=100)
-
-                follows_data = [
-                    (target, user.author, follow_type)
-                    for user in scraped_users
-                ]
-                all_follows.extend(follows_data)
-                print(f"   ✅ Found {len(scraped_users)} {follow_type}")
-
-        # Save network data results
-        columns = ['target_username', 'other_username', 'type']
-        df = pd.DataFrame(all_follows, columns=columns)
 
         # Add timestamp to output filename
         timestamp = time.strftime("%Y%m%d_%H%M%S")
-        output_file = f"user_follows_{timestamp}.csv"
-        df.to_csv(output_file, index=False)
-        print(f"✅ Network data saved to {output_file}")
-        print(f"📊 Total relationships scraped: {len(all_follows)}")
+        output_stem = f"user_follows_{timestamp}"
+
+        # Browser pool: the main driver plus extra logged-in sessions
+        with WebDriverPool(setup_web_driver, NETWORK_WORKERS, drivers=[driver]) as driver_pool, \
+                ScrapeOutputWriter(output_stem, FOLLOW_SCHEMA) as writer:
+            network_scraper = SearchScrapperDetails(driver, driver_pool=driver_pool)
+            for target in users_follows:
+                print(f"🔄 Processing user network: @{target}")
+
+                # Scrape following/followers/verified followers in parallel
+                network_data = network_scraper.scrape_multiple_network_types(target, 100)
+                for follow_type, scraped_users in network_data.items():
+                    writer.write_rows(
+                        (target, username, follow_type)
+                        for username in scraped_users
+                    )
+                    print(f"   ✅ Found {len(scraped_users)} {follow_type}")
+
+        print(f"✅ Network data saved to {writer.csv_file} and {writer.parquet_file}")
+        print(f"📊 Total relationships scraped: {writer.rows_written}")
 
     else:
         print("❌ Invalid side argument. Use 0 for hashtags, 1 for user timelines, or 3 for user follows.")
         return
 
     # Cleanup
-    driver.quit()
+    quit_driver()
     
     # Execution summary
     end_time = time.time()
@@ -228,6 +373,7 @@ if __name__ == '__main__':
     - excel_file: Path to Excel file containing usernames
     - username_column: Column name in Excel file with usernames
     - side: Scraping mode (0=hashtags, 1=users, 3=networks)
+    - workers: Parallel browser processes for side 0/1 (each logs in separately)
     
     Output: CSV files with scraped Twitter data
     """
@@ -235,9 +381,10 @@ if __name__ == '__main__':
     # Configuration - UPDATE THESE PATHS FOR YOUR SETUP
     excel_file = "/home/lebanon-israel-war-user/Desktop/Tweets/all user name.xlsx"  # UPDATE THIS PATH
     username_column = "all_user_name"  # UPDATE THIS COLUMN NAME
+    workers = 1  # Parallel browser processes for hashtag/user scraping
     
     print("🚀 Twitter Scraper by Jonathan Uri")
     print("=" * 50)
     
     # Run user timeline scraping
-    main(side=1, excel_file_path=excel_file, username_column=username_column)
\ No newline at end of file
+    main(side=1, excel_file_path=excel_file, username_column=username_column, workers=workers)
\ No newline at end of file
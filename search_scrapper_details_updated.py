@@ -7,7 +7,7 @@ Twitter User Network Scraper
 Specialized module for scraping user networks (followers/following/verified followers) on Twitter.
 
 Input: Twitter user profile URLs (following/followers pages)
-Output: UserDetail objects with username information
+Output: Sets of usernames (UserDetail objects via to_user_details)
 
 Author: Jonathan Uri
 Date: December 2024
@@ -17,10 +17,168 @@ from selenium import webdriver
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import StaleElementReferenceException, NoSuchElementException, TimeoutException
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from queue import Queue
 from time import sleep
+from typing import Callable
+import logging
 import random
 
+logger = logging.getLogger(__name__)
+
+# Network type -> page URL template ({u} is the username)
+NETWORK_URLS = (
+    ("following", "https://x.com/{u}/following"),
+    ("followers", "https://x.com/{u}/followers"),
+    ("verified_followers", "https://x.com/{u}/verified_followers"),
+)
+
+# Locators of the user list cells and of the "no users" placeholder
+USERCELL_SEL = (By.CSS_SELECTOR, 'button[data-testid="UserCell"]')
+EMPTY_STATE_SEL = (By.CSS_SELECTOR, 'div[data-testid="emptyState"]')
+
+# URL fragment -> page type used in log messages (verified_followers is
+# listed first because "/followers" is a substring of it)
+PAGE_TYPES = {
+    "/verified_followers": "verified followers",
+    "/following": "following",
+    "/followers": "followers",
+}
+
+# Collects the username (the "@" span text without the "@") of every loaded
+# user cell, then scrolls down ~90% of the viewport (±5% jitter) so each step
+# reveals a full page of cells without skipping any, and returns
+# {u: usernames, h: page height}
+SCRAPE_AND_SCROLL_JS = """
+const usernames = [];
+for (const cell of document.querySelectorAll('button[data-testid="UserCell"]')) {
+    for (const span of cell.querySelectorAll('span')) {
+        const text = span.textContent.trim();
+        if (text.startsWith('@')) {
+            if (text.length > 1) usernames.push(text.slice(1));
+            break;
+        }
+    }
+}
+window.scrollBy(0, window.innerHeight * (0.9 + (Math.random() - 0.5) * 0.1));
+return {u: usernames, h: document.body.scrollHeight};
+"""
+
+PAGE_HEIGHT_JS = "return document.body.scrollHeight"
+
+# Seconds to wait for a scroll to load more users before counting it as empty
+SCROLL_LOAD_TIMEOUT = 3
+
+# HTTP connections kept open to chromedriver per WebDriver session
+# (Selenium's default pool holds a single connection)
+POOL_MAXSIZE = 16
+
+def configure_connection_pool(driver: webdriver.Chrome, maxsize: int = POOL_MAXSIZE):
+    """
+    Widens the urllib3 connection pool a WebDriver uses to talk to chromedriver.
+
+    With the default pool of one connection, commands sent to the same session
+    from several threads queue behind each other and log "Connection pool is
+    full" warnings. Local Chrome drivers do not accept a ClientConfig at
+    construction, so the pool of an existing session is rebuilt instead.
+    Call it once per session, right after creating it.
+
+    Parameters:
+    - driver (webdriver.Chrome): Selenium WebDriver instance
+    - maxsize (int): Maximum pooled connections
+
+    Returns:
+    - bool: True if the pool was reconfigured (needs Selenium >= 4.26)
+    """
+    executor = driver.command_executor
+    client_config = getattr(executor, '_client_config', None)
+    # Relies on RemoteConnection internals; leave other Selenium versions untouched
+    if client_config is None or not hasattr(client_config, 'init_args_for_pool_manager') \
+            or not hasattr(executor, '_get_connection_manager'):
+        return False
+    # RemoteConnection reads the PoolManager arguments from this nested key
+    client_config.init_args_for_pool_manager = {'init_args_for_pool_manager': {'maxsize': maxsize}}
+    if client_config.keep_alive:
+        old_conn = getattr(executor, '_conn', None)
+        executor._conn = executor._get_connection_manager()
+        if old_conn is not None:
+            old_conn.clear()  # Close the connections of the replaced pool
+    return True
+
+class WebDriverPool:
+    """
+    Pool of warm WebDriver sessions shared by scraping threads.
+
+    Browser startup and login take seconds, so sessions are created once and
+    reused across users instead of launched per scrape. Each session is used
+    by one thread at a time.
+
+    Input: Function creating a logged-in WebDriver
+    Output: Sessions lent out through acquire()
+    """
+    def __init__(self, driver_factory: Callable[[], webdriver.Chrome], size: int, drivers=(),
+                 pool_maxsize: int = None):
+        """
+        Prewarm the pool.
+
+        Parameters:
+        - driver_factory (callable): Function returning a new logged-in WebDriver
+        - size (int): Number of sessions in the pool
+        - drivers (iterable): Existing sessions to include (not quit by close())
+        - pool_maxsize (int): Optional chromedriver connection pool size, applied
+            once to each session the pool creates (see configure_connection_pool)
+        """
+        self._idle = Queue()
+        self._owned = []
+        for driver in drivers:
+            self._idle.put(driver)
+        for _ in range(size - self._idle.qsize()):
+            driver = driver_factory()
+            if pool_maxsize:
+                configure_connection_pool(driver, pool_maxsize)
+            self._owned.append(driver)
+            self._idle.put(driver)
+
+    @contextmanager
+    def acquire(self):
+        """
+        Borrow an idle session, waiting until one is free.
+
+        Usage:
+            with pool.acquire() as driver:
+                SearchScrapperDetails(driver).scrape_multiple_network_types(username)
+        """
+        driver = self._idle.get()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def release(self, driver: webdriver.Chrome):
+        """Return a session to the pool, dropping the page DOM but keeping the browser alive"""
+        try:
+            driver.get("about:blank")
+        except WebDriverException:
+            pass
+        self._idle.put(driver)
+
+    def close(self):
+        """Quit the sessions created by the pool"""
+        for driver in self._owned:
+            try:
+                driver.quit()
+            except WebDriverException:
+                pass
+        self._owned = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
 class UserDetail:
     """
     Represents a Twitter user's basic profile information.
@@ -31,6 +189,8 @@ class UserDetail:
     Input: Raw username data from Twitter elements
     Output: Clean, standardized username string
     """
+    __slots__ = ('author',)
+
     def __init__(self, author):
         """
         Initialize UserDetail with username.
@@ -51,6 +211,18 @@ class UserDetail:
         """Make UserDetail hashable for use in sets"""
         return hash(self.author)
 
+def to_user_details(usernames):
+    """
+    Wraps scraped usernames in UserDetail objects, for callers expecting them.
+
+    Parameters:
+    - usernames (iterable[str]): Usernames without @ symbol
+
+    Returns:
+    - set[UserDetail]: One UserDetail per username
+    """
+    return {UserDetail(author=username) for username in usernames}
+
 class SearchScrapperDetails:
     """
     Advanced scraper for Twitter user network data (followers/following lists).
@@ -63,16 +235,110 @@ class SearchScrapperDetails:
     - Robust error handling
     
     Input: WebDriver instance and Twitter network URLs
-    Output: Sets of UserDetail objects
+    Output: Sets of usernames
     """
-    def __init__(self, driver: webdriver.Chrome):
+    def __init__(self, driver: webdriver.Chrome, pool_maxsize: int = None,
+                 driver_factory: Callable[[], webdriver.Chrome] = None,
+                 driver_pool: WebDriverPool = None):
         """
         Initialize the network scraper with a configured WebDriver.
 
         Parameters:
         - driver (webdriver.Chrome): Selenium WebDriver instance
+        - pool_maxsize (int): Optional chromedriver connection pool size
+            (see configure_connection_pool), for sessions shared between threads;
+            applied once to this driver and to each session from driver_factory
+            (give it to WebDriverPool for pooled sessions)
+        - driver_factory (callable): Optional function returning a new logged-in
+            WebDriver; lets scrape_multiple_network_types scrape all network
+            types in parallel, one browser session each
+        - driver_pool (WebDriverPool): Optional pool of warm sessions, used for
+            the parallel scrape instead of launching new ones from driver_factory
         """
         self.driver = driver
+        self.pool_maxsize = pool_maxsize
+        self.driver_factory = driver_factory
+        self.driver_pool = driver_pool
+        if pool_maxsize:
+            configure_connection_pool(driver, pool_maxsize)
+
+    def scrape_multiple_network_types(self, username: str, max_users: int = 100):
+        """
+        Scrapes the following, followers and verified followers lists of a user.
+
+        Parameters:
+        - username (str): Twitter username (without @)
+        - max_users (int): Maximum number of users to scrape per list
+
+        Returns:
+        - dict[str, set[str]]: Network type -> scraped usernames
+        
+        Input: Twitter username
+        Output: Users of each network type
+        
+        Notes:
+        - With a driver_pool or driver_factory, the three lists are scraped at
+          the same time in separate browser sessions (a WebDriver loads one
+          page at a time)
+        - Otherwise they are scraped one after another with this scraper's driver
+        """
+        network_urls = {name: template.format(u=username) for name, template in NETWORK_URLS}
+        print(f"🌐 Scraping network of @{username}")
+
+        if self.driver_pool is None and self.driver_factory is None:
+            network_data = {}
+            for i, (network_type, url) in enumerate(network_urls.items()):
+                if i > 0:
+                    sleep(random.uniform(2, 4))  # Pause between page loads
+                network_data[network_type] = self.scrape_following_page(url, max_users)
+            return network_data
+
+        with ThreadPoolExecutor(max_workers=len(network_urls)) as executor:
+            futures = {
+                network_type: executor.submit(self._scrape_in_other_session, url, max_users)
+                for network_type, url in network_urls.items()
+            }
+            return {network_type: future.result() for network_type, future in futures.items()}
+
+    def get_network_statistics(self, network_data, include_usernames: bool = False):
+        """
+        Summarizes the networks returned by scrape_multiple_network_types.
+
+        Parameters:
+        - network_data (dict[str, set[str]]): Network type -> scraped usernames
+        - include_usernames (bool): Also list the usernames of each entry
+
+        Returns:
+        - dict: Network type -> {'count'[, 'usernames']}, plus 'mutual_follows'
+            when both following and followers were scraped
+        """
+        def summarize(users):
+            entry = {'count': len(users)}
+            if include_usernames:
+                entry['usernames'] = list(users)
+            return entry
+
+        stats = {network_type: summarize(users) for network_type, users in network_data.items()}
+
+        # Users that the account follows and that follow it back
+        if 'following' in network_data and 'followers' in network_data:
+            stats['mutual_follows'] = summarize(network_data['following'] & network_data['followers'])
+
+        return stats
+
+    def _scrape_in_other_session(self, query_url: str, max_users: int):
+        """Scrapes one network page in a pooled session, or a new one from driver_factory"""
+        if self.driver_pool is not None:
+            with self.driver_pool.acquire() as driver:
+                return SearchScrapperDetails(driver).scrape_following_page(query_url, max_users)
+
+        driver = self.driver_factory()
+        try:
+            if self.pool_maxsize:
+                configure_connection_pool(driver, self.pool_maxsize)
+            return SearchScrapperDetails(driver).scrape_following_page(query_url, max_users)
+        finally:
+            driver.quit()
 
     def scrape_following_page(self, query_url: str, max_users: int):
         """
@@ -87,95 +353,93 @@ class SearchScrapperDetails:
         - max_users (int): Maximum number of users to scrape
 
         Returns:
-        - set[UserDetail]: Set of UserDetail objects with scraped user data
+        - set[str]: Scraped usernames (without @ symbol)
         
         Input: Twitter network page URL (following/followers)
-        Output: Set of UserDetail objects with usernames
+        Output: Set of unique usernames
         """
         print(f"🌐 Accessing network page: {query_url}")
         self.driver.get(query_url)
         
         # Determine page type for logging
-        page_type = "unknown"
-        if "/following" in query_url:
-            page_type = "following"
-        elif "/verified_followers" in query_url:
-            page_type = "verified followers"
-        elif "/followers" in query_url:
-            page_type = "followers"
-            
+        page_type = next((name for fragment, name in PAGE_TYPES.items() if fragment in query_url), "unknown")
+
         print(f"📊 Scraping {page_type} list...")
         
-        retries = 3
         user_details = set()
-        processed_elements = set()
 
-        # Check if the page shows empty state
-        for attempt in range(retries):
-            try:
-                empty_state_element = self.driver.find_element(By.XPATH, '//div[@data-testid="emptyState"]')
-                print(f"❌ No {page_type} found on this page")
-                return set()
-            except (NoSuchElementException, StaleElementReferenceException):
-                sleep(0.5)
-
-        # Wait for user list to load
+        # Wait for the user list or the empty state, whichever renders first
         try:
-            WebDriverWait(self.driver, 30).until(
-                EC.presence_of_element_located((By.XPATH, '//button[@data-testid="UserCell"]'))
-            )
-            print(f"✅ {page_type.capitalize()} list loaded successfully")
+            WebDriverWait(self.driver, 30).until(EC.any_of(
+                EC.presence_of_element_located(USERCELL_SEL),
+                EC.presence_of_element_located(EMPTY_STATE_SEL)
+            ))
         except TimeoutException:
             print(f"⏱️  Timeout: No {page_type} found after waiting")
             return set()
 
+        # Check if the page shows empty state
+        if self.driver.find_elements(*EMPTY_STATE_SEL):
+            print(f"❌ No {page_type} found on this page")
+            return set()
+        print(f"✅ {page_type.capitalize()} list loaded successfully")
+
         print("🔄 Scraping users...")
-        prev_height = self.driver.execute_script('return document.body.scrollHeight')
         no_new_content_attempts = 0
         max_no_content_attempts = 20
 
         while len(user_details) < max_users and no_new_content_attempts < max_no_content_attempts:
             try:
-                # Find all user elements on current page
-                loaded_users = self.driver.find_elements(By.XPATH, '//button[@data-testid="UserCell"]')
+                # Extract all visible usernames, scroll to load more users and read
+                # the page height in one browser round-trip
+                loaded_usernames, curr_height = self._scrape_and_scroll_js()
                 
-                if len(loaded_users) > 0 and len(user_details) % 50 == 0:
-                    print(f"   📊 Found {len(loaded_users)} user elements, extracted {len(user_details)} unique users")
-
-                for user_element in loaded_users:
-                    if len(user_details) >= max_users:
-                        break
-                        
-                    # Use element ID to avoid processing same element twice
-                    element_id = user_element.id
-                    if element_id in processed_elements:
-                        continue
-
-                    try:
-                        # Extract username from user element
-                        username_element = user_element.find_element(By.XPATH, './/span[contains(text(), "@")]')
-                        username = username_element.text.replace("@", "")
-                        
-                        if username:  # Only add non-empty usernames
-                            user_details.add(UserDetail(author=username))
-                            processed_elements.add(element_id)
-                            
-                    except NoSuchElementException:
-                        # Some user elements might not have visible usernames
-                        continue
-                    except Exception as e:
-                        print(f"⚠️  Error extracting user data: {e}")
-                        continue
+                if len(loaded_usernames) > 0 and len(user_details) % 50 == 0:
+                    logger.debug("Found %d user elements, extracted %d unique users",
+                                 len(loaded_usernames), len(user_details))
+
+                # Deduplicate by username; users still in view from earlier
+                # scrolls are simply re-added to the set
+                if len(user_details) + len(loaded_usernames) <= max_users:
+                    user_details.update(loaded_usernames)
+                else:
+                    for username in loaded_usernames:
+                        if len(user_details) >= max_users:
+                            break
+                        user_details.add(username)
 
                 # Check if we've reached the target
                 if len(user_details) >= max_users:
                     print(f"🎯 Reached target of {max_users} users")
                     break
 
-                # Scroll to load more users
-                scroll_distance = random.uniform(700, 1000)
-                self.driver.execute_script(f'window.scrollBy(0, {scroll_distance})')
-                sleep(random.uniform(1, 3))
+                # Wait until the scroll loads new content, or a short cap elapses
+                try:
+                    WebDriverWait(self.driver, SCROLL_LOAD_TIMEOUT).until(
+                        lambda d: d.execute_script(PAGE_HEIGHT_JS) > curr_height)
+                    no_new_content_attempts = 0
+                except TimeoutException:
+                    no_new_content_attempts += 1
+                    logger.debug("No new content loaded (attempt %d/%d)",
+                                 no_new_content_attempts, max_no_content_attempts)
+
+            except Exception as e:
+                print(f"❌ Error while scraping {page_type}: {e}")
+                break
+
+        print(f"✅ Scraped {len(user_details)} unique users from {page_type} list")
+        return user_details
 
-                # Check if new content loaded
-                curr_height = self.driver.execute_script('return 
\ No newline at end of file
+    def _scrape_and_scroll_js(self):
+        """
+        Extracts loaded usernames, scrolls and reads the page height in one script call.
+
+        Replaces one chromedriver round-trip per user cell (find the "@" span,
+        then read its text) plus the scroll and height calls with a single
+        message to the browser.
+
+        Returns:
+        - tuple: (list of usernames without @ in page order, page height after scrolling)
+        """
+        result = self.driver.execute_script(SCRAPE_AND_SCROLL_JS)
+        return result['u'], result['h']
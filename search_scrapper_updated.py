@@ -18,11 +18,89 @@ from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import StaleElementReferenceException, NoSuchElementException, TimeoutException
-from time import sleep
-import random
+from selenium.common.exceptions import TimeoutException
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+import json
 import re
+import requests
+
+# Locators of loaded tweets and of the search "No results" message
+TWEET_SEL = (By.CSS_SELECTOR, 'article[data-testid="tweet"]')
+NO_RESULTS_SEL = (By.CSS_SELECTOR, "span.css-1jxf684")
+
+# Hashtags in tweet text
+_HASHTAG_RE = re.compile(r'#\w+')
+
+# Extracts every field of one tweet <article> in the page, with the same
+# selectors and fallbacks the scraper used per field (null where it used None)
+EXTRACT_TWEET_JS = """
+function extractTweet(el) {
+    const pick = (selector, read, fallback = null) => {
+        try {
+            const node = el.querySelector(selector);
+            const value = node ? read(node) : null;
+            return value == null ? fallback : value;
+        } catch (e) {
+            return fallback;
+        }
+    };
+    const text = node => node.innerText;
+    const url = pick('a[href*="/status/"]', node => node.href);
+    // First span with a direct text node containing "@" (the handle)
+    let author = 'Unknown';
+    for (const span of el.querySelectorAll('span')) {
+        if (Array.from(span.childNodes).some(n => n.nodeType === Node.TEXT_NODE && n.nodeValue.includes('@'))) {
+            author = span.innerText.replaceAll('@', '');
+            break;
+        }
+    }
+    const video = el.querySelector('div[data-testid="videoPlayer"] video');
+    return {
+        id: url ? url.split('/').pop() : null,
+        url: url,
+        author: author,
+        fullName: pick('div[data-testid="User-Name"] span', text, ''),
+        content: pick('div[data-testid="tweetText"]', text, ''),
+        timestamp: pick('time', node => node.getAttribute('datetime'), 'No timestamp available'),
+        retweets: pick('button[data-testid="retweet"]', text, '0'),
+        likes: pick('button[data-testid="like"]', text, '0'),
+        comments: pick('button[data-testid="reply"]', text, '0'),
+        bookmarks: pick('button[data-testid="bookmark"]', text, '0'),
+        views: pick('[role="group"]', node => node.innerText.split('\\n').pop()),
+        image_url: pick('div[data-testid="tweetPhoto"] img', node => node.getAttribute('src')),
+        video_url: video ? video.getAttribute('src') : null,
+        video_preview_image_url: video ? video.getAttribute('poster') : null,
+    };
+}
+"""
+
+# Script extracting every tweet loaded in the page, in page order
+PAGE_TWEETS_JS = EXTRACT_TWEET_JS + """
+return Array.from(document.querySelectorAll('article[data-testid="tweet"]'), extractTweet);
+"""
+
+# Scrolls down to load more tweets and returns the page height after scrolling
+SCROLL_JS = "window.scrollBy(0, 1000); return document.body.scrollHeight;"
 
+PAGE_HEIGHT_JS = "return document.body.scrollHeight"
+
+# Seconds to wait for a scroll to load more tweets before counting it as empty
+SCROLL_LOAD_TIMEOUT = 5
+
+# X web app GraphQL search, used instead of scrolling when configured.
+# UPDATE THESE from a SearchTimeline request in the browser's network panel
+# (query ID from the URL path, bearer token from the authorization header,
+# features from the "features" URL parameter); leave None to always scroll.
+SEARCH_TIMELINE_QUERY_ID = None
+API_BEARER_TOKEN = None
+SEARCH_TIMELINE_FEATURES = {}
+SEARCH_TIMELINE_URL = 'https://x.com/i/api/graphql/{}/SearchTimeline'
+API_PAGE_SIZE = 20
+
+@dataclass(frozen=True, slots=True, eq=False)
 class Tweet:
     """
     Comprehensive tweet data structure containing all extractable tweet information.
@@ -42,26 +120,25 @@ class Tweet:
     - image_url (str): URL of attached image (if any)
     - video_url (str): URL of attached video (if any)
     - video_preview_image_url (str): URL of video preview/thumbnail
-    - hashtags (list): List of all hashtags found in tweet content
+    - hashtags (tuple): All hashtags found in tweet content
     - url (str): Direct URL to the tweet
     """
-    def __init__(self, ID, author, fullName, content, timestamp, retweets, likes, hashtag, views, comments, bookmarks, image_url, video_url=None, video_preview_image_url=None, hashtags=None, url=None):
-        self.ID = ID
-        self.author = author
-        self.fullName = fullName
-        self.content = content
-        self.timestamp = timestamp
-        self.retweets = retweets
-        self.likes = likes
-        self.hashtag = hashtag
-        self.views = views
-        self.comments = comments
-        self.bookmarks = bookmarks
-        self.image_url = image_url
-        self.video_url = video_url
-        self.video_preview_image_url = video_preview_image_url
-        self.hashtags = hashtags if hashtags else []
-        self.url = url
+    ID: str
+    author: str
+    fullName: str
+    content: str
+    timestamp: str
+    retweets: str
+    likes: str
+    hashtag: str
+    views: Optional[str]
+    comments: str
+    bookmarks: str
+    image_url: Optional[str]
+    video_url: Optional[str] = None
+    video_preview_image_url: Optional[str] = None
+    hashtags: Tuple[str, ...] = ()
+    url: Optional[str] = None
 
     def __hash__(self):
         """Make Tweet hashable for use in sets"""
@@ -107,202 +184,254 @@ class SearchScrapper:
         """
         print(f"🔍 Starting scrape for: {hashtag}")
         print(f"🌐 URL: {query_url}")
+
+        # Page through the JSON search API when available, else scroll the page
+        raw_query = parse_qs(urlparse(query_url).query).get('q', [''])[0]
+        api_tweets = self.scrape_twitter_query_api(raw_query, hashtag, max_tweets)
+        if api_tweets is not None:
+            return api_tweets
         
         self.driver.get(query_url)
 
-        # Check for "No results" message
-        no_results = False
-        retries = 3
-        for attempt in range(retries):
-            try:
-                no_results_element = self.driver.find_element(By.CSS_SELECTOR, "span.css-1jxf684")
-                if "No results" in no_results_element.text:
-                    print(f"❌ No results found for: {hashtag}")
-                    no_results = True
-                    break
-            except (NoSuchElementException, StaleElementReferenceException):
-                sleep(0.5)
-
-        if no_results:
-            return set()
-
-        # Wait for tweets to load
+        # Wait for the first tweet or the "No results" message, whichever renders first
         try:
-            WebDriverWait(self.driver, 30).until(
-                EC.presence_of_element_located((By.XPATH, '//article[@data-testid="tweet"]'))
-            )
-            print(f"✅ Tweets loaded successfully for: {hashtag}")
+            WebDriverWait(self.driver, 30).until(EC.any_of(
+                EC.presence_of_element_located(TWEET_SEL),
+                EC.text_to_be_present_in_element(NO_RESULTS_SEL, "No results")
+            ))
         except TimeoutException:
             print(f"⏱️  Timeout: No tweets found for: {hashtag}")
             return set()
 
+        if not self.driver.find_elements(*TWEET_SEL):
+            print(f"❌ No results found for: {hashtag}")
+            return set()
+        print(f"✅ Tweets loaded successfully for: {hashtag}")
+
         print("🔄 Scraping in progress...")
-        hashtag_tweets = set()  # Store unique tweets
-        processed_ids = set()   # Track processed tweet IDs
-        prev_height = self.driver.execute_script('return document.body.scrollHeight')
+        hashtag_tweets = {}  # Unique tweets by ID
         scroll_attempts = 0
         max_scroll_attempts = 10
 
         while len(hashtag_tweets) < max_tweets and scroll_attempts < max_scroll_attempts:
             try:
-                loaded_tweets = self.driver.find_elements(By.XPATH, '//article[@data-testid="tweet"]')
+                # Extract the data of all loaded tweets in one browser round-trip
+                loaded_tweets = self.driver.execute_script(PAGE_TWEETS_JS)
                 print(f"📊 Found {len(loaded_tweets)} tweet elements on page")
                 
-                for tweet_element in loaded_tweets:
+                for data in loaded_tweets:
                     if len(hashtag_tweets) >= max_tweets:
                         break
 
+                    if not data['id'] or data['id'] in hashtag_tweets:
+                        continue
+
                     try:
-                        # Extract tweet data with comprehensive error handling
-                        tweet_data = self._extract_tweet_data(tweet_element, hashtag, processed_ids)
+                        hashtag_tweets[data['id']] = self._tweet_from_data(data, hashtag)
                         
-                        if tweet_data and tweet_data.ID not in processed_ids:
-                            hashtag_tweets.add(tweet_data)
-                            processed_ids.add(tweet_data.ID)
-                            
-                            if len(hashtag_tweets) % 10 == 0:
-                                print(f"   📝 Scraped {len(hashtag_tweets)} tweets so far...")
+                        if len(hashtag_tweets) % 10 == 0:
+                            print(f"   📝 Scraped {len(hashtag_tweets)} tweets so far...")
                                 
                     except Exception as e:
                         print(f"⚠️  Error processing individual tweet: {e}")
                         continue
 
-                # Scroll to load more tweets
-                self.driver.execute_script('window.scrollBy(0, 1000)')
-                sleep(random.uniform(1, 3))
-                curr_height = self.driver.execute_script('return document.body.scrollHeight')
-
-                if curr_height == prev_height:
+                # Scroll to load more tweets, then wait until new content
+                # extends the page or a short cap elapses
+                scrolled_height = self.driver.execute_script(SCROLL_JS)
+                try:
+                    WebDriverWait(self.driver, SCROLL_LOAD_TIMEOUT).until(
+                        lambda d: d.execute_script(PAGE_HEIGHT_JS) > scrolled_height)
+                    scroll_attempts = 0
+                except TimeoutException:
                     scroll_attempts += 1
                     print(f"🔄 No new content, attempt {scroll_attempts}/{max_scroll_attempts}")
-                else:
-                    scroll_attempts = 0
-                    
-                prev_height = curr_height
 
-            except StaleElementReferenceException:
-                print("⚠️  Stale element detected, retrying...")
-                continue
             except Exception as e:
                 print(f"❌ Unexpected error during scraping: {e}")
                 break
 
         print(f"✅ Scraping completed for {hashtag}")
         print(f"📊 Total tweets collected: {len(hashtag_tweets)}")
-        return hashtag_tweets
+        return set(hashtag_tweets.values())
 
-    def _extract_tweet_data(self, tweet_element, hashtag, processed_ids):
+    def scrape_twitter_query_api(self, query: str, hashtag: str, max_tweets: int):
         """
-        Extracts comprehensive data from a single tweet element.
-        
-        Parameters:
-        - tweet_element: Selenium WebElement representing a tweet
-        - hashtag: Context hashtag for the search
-        - processed_ids: Set of already processed tweet IDs
-        
-        Returns:
-        - Tweet: Tweet object with extracted data or None if extraction fails
-        """
-        try:
-            # Extract tweet URL and ID first
-            try:
-                tweet_link_element = tweet_element.find_element(By.XPATH, './/a[contains(@href, "/status/")]')
-                url = tweet_link_element.get_attribute('href')
-                tweet_id = url.split('/')[-1] if url else None
-            except NoSuchElementException:
-                return None
+        Scrapes tweets through X's SearchTimeline GraphQL endpoint.
 
-            if not tweet_id or tweet_id in processed_ids:
-                return None
+        Uses the logged-in browser's cookies, so each page of up to
+        API_PAGE_SIZE tweets is one HTTP request instead of a scroll and
+        render cycle.
 
-            # Extract author username
-            try:
-                author = tweet_element.find_element(By.XPATH, './/span[contains(text(), "@")]').text.replace("@", "")
-            except NoSuchElementException:
-                author = "Unknown"
+        Parameters:
+        - query (str): Raw search query, e.g. '(#hashtag) until:2023-12-02 since:2023-11-25'
+        - hashtag (str): Associated hashtag/search term for context
+        - max_tweets (int): Maximum number of tweets to scrape
 
-            # Extract tweet content
-            try:
-                content = tweet_element.find_element(By.XPATH, './/div[@data-testid="tweetText"]').text
-            except NoSuchElementException:
-                content = ""
+        Returns:
+        - set[Tweet]: Scraped tweets, or None if the API is not configured or
+            rejects the first request (e.g. 401/429), to fall back to scrolling;
+            a failure on a later page returns the tweets fetched so far
+        """
+        if not (SEARCH_TIMELINE_QUERY_ID and API_BEARER_TOKEN and query):
+            return None
 
-            # Extract author's full name
-            try:
-                full_name = tweet_element.find_element(By.XPATH, './/div[@data-testid="User-Name"]//span').text
-            except NoSuchElementException:
-                full_name = ""
+        session = self._api_session()
+        url = SEARCH_TIMELINE_URL.format(SEARCH_TIMELINE_QUERY_ID)
+        hashtag_tweets = {}
+        cursor = None
 
-            # Extract timestamp
+        while len(hashtag_tweets) < max_tweets:
+            variables = {'rawQuery': query, 'count': API_PAGE_SIZE,
+                         'querySource': 'typed_query', 'product': 'Latest'}
+            if cursor:
+                variables['cursor'] = cursor
             try:
-                timestamp_element = tweet_element.find_element(By.XPATH, './/time')
-                timestamp = timestamp_element.get_attribute('datetime')
-            except NoSuchElementException:
-                timestamp = "No timestamp available"
+                response = session.get(url, params={
+                    'variables': json.dumps(variables),
+                    'features': json.dumps(SEARCH_TIMELINE_FEATURES),
+                }, timeout=30)
+                if response.status_code != 200:
+                    error = f"returned {response.status_code}"
+                else:
+                    # Rate-limited or flagged sessions may get a 200 HTML/challenge page
+                    instructions = (response.json().get('data', {}).get('search_by_raw_query', {})
+                                    .get('search_timeline', {}).get('timeline', {}).get('instructions', []))
+                    error = None
+            except (requests.RequestException, ValueError, AttributeError) as e:
+                error = f"request failed: {e}"
+
+            if error:
+                if not hashtag_tweets:
+                    print(f"⚠️  Search API {error}, scrolling instead")
+                    return None
+                # Keep the pages already fetched rather than scrolling from scratch
+                print(f"⚠️  Search API {error}, keeping the tweets fetched so far")
+                break
 
-            # Extract engagement metrics
-            try:
-                retweet_count = tweet_element.find_element(By.XPATH, './/button[@data-testid="retweet"]').text
-            except NoSuchElementException:
-                retweet_count = "0"
+            new_tweets, cursor = self._parse_search_timeline(instructions)
+            for data in new_tweets:
+                if len(hashtag_tweets) >= max_tweets:
+                    break
+                if data['id'] not in hashtag_tweets:
+                    hashtag_tweets[data['id']] = self._tweet_from_data(data, hashtag)
 
-            try:
-                like_count = tweet_element.find_element(By.XPATH, './/button[@data-testid="like"]').text
-            except NoSuchElementException:
-                like_count = "0"
+            print(f"   📝 Scraped {len(hashtag_tweets)} tweets so far...")
+            if not new_tweets or not cursor:
+                break
 
-            try:
-                comments = tweet_element.find_element(By.XPATH, './/button[@data-testid="reply"]').text
-            except NoSuchElementException:
-                comments = "0"
+        print(f"✅ Scraping completed for {hashtag}")
+        print(f"📊 Total tweets collected: {len(hashtag_tweets)}")
+        return set(hashtag_tweets.values())
+
+    def _api_session(self):
+        """Builds a requests session authenticated with the browser's X cookies"""
+        session = requests.Session()
+        for cookie in self.driver.get_cookies():
+            session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'))
+        session.headers.update({
+            'authorization': f'Bearer {API_BEARER_TOKEN}',
+            'x-csrf-token': session.cookies.get('ct0', ''),
+            'x-twitter-auth-type': 'OAuth2Session',
+            'x-twitter-active-user': 'yes',
+            'user-agent': self.driver.execute_script('return navigator.userAgent'),
+        })
+        return session
+
+    def _parse_search_timeline(self, instructions):
+        """
+        Extracts tweets and the next-page cursor from SearchTimeline instructions.
 
-            try:
-                bookmarks = tweet_element.find_element(By.XPATH, './/button[@data-testid="bookmark"]').text
-            except NoSuchElementException:
-                bookmarks = "0"
+        Parameters:
+        - instructions (list): timeline.instructions of a SearchTimeline response
 
-            # Extract view count
-            try:
-                views = tweet_element.find_element(By.XPATH, "//*[@role='group']").text.split('\n')[-1]
-            except NoSuchElementException:
-                views = None
-
-            # Extract media URLs
-            image_url = self._extract_image_url(tweet_element)
-            video_url, video_preview_url = self._extract_video_urls(tweet_element)
-
-            # Extract hashtags from content
-            hashtags = re.findall(r'#\w+', content) if content else []
-
-            # Create and return Tweet object
-            return Tweet(
-                ID=tweet_id, author=author, fullName=full_name, content=content, 
-                timestamp=timestamp, retweets=retweet_count, likes=like_count, 
-                hashtag=hashtag, views=views, comments=comments, bookmarks=bookmarks, 
-                image_url=image_url, video_url=video_url, 
-                video_preview_image_url=video_preview_url, hashtags=hashtags, url=url
-            )
-
-        except Exception as e:
-            print(f"⚠️  Error extracting tweet data: {e}")
+        Returns:
+        - tuple: (list of tweet field dicts as returned by EXTRACT_TWEET_JS, bottom cursor or None)
+        """
+        tweets = []
+        cursor = None
+        for instruction in instructions:
+            entries = instruction.get('entries', [])
+            if 'entry' in instruction:  # TimelineReplaceEntry (cursor updates)
+                entries = [instruction['entry']]
+            for entry in entries:
+                content = entry.get('content', {})
+                if content.get('cursorType') == 'Bottom':
+                    cursor = content.get('value')
+                    continue
+                result = content.get('itemContent', {}).get('tweet_results', {}).get('result')
+                data = self._api_tweet_data(result) if result else None
+                if data:
+                    tweets.append(data)
+        return tweets, cursor
+
+    def _api_tweet_data(self, result):
+        """Maps a GraphQL tweet result to the fields returned by EXTRACT_TWEET_JS"""
+        if result.get('__typename') == 'TweetWithVisibilityResults':
+            result = result.get('tweet', {})
+        legacy = result.get('legacy')
+        if not legacy or not legacy.get('id_str'):
             return None
 
-    def _extract_image_url(self, tweet_element):
-        """Extract image URL from tweet element"""
-        try:
-            tweet_photo_div = tweet_element.find_element(By.XPATH, './/div[@data-testid="tweetPhoto"]//img')
-            return tweet_photo_div.get_attribute('src')
-        except NoSuchElementException:
-            return None
+        user = result.get('core', {}).get('user_results', {}).get('result', {})
+        # Newer responses move screen_name/name from legacy to core
+        user_names = {**user.get('legacy', {}), **user.get('core', {})}
+        author = user_names.get('screen_name', 'Unknown')
 
-    def _extract_video_urls(self, tweet_element):
-        """Extract video URL and preview image from tweet element"""
         try:
-            video_elements = tweet_element.find_elements(By.XPATH, './/div[@data-testid="videoPlayer"]//video')
-            if video_elements:
-                video_url = video_elements[0].get_attribute('src')
-                video_preview_url = video_elements[0].get_attribute('poster')
-                return video_url, video_preview_url
-        except NoSuchElementException:
-            pass
-        return None, None
\ No newline at end of file
+            timestamp = datetime.strptime(legacy['created_at'], '%a %b %d %H:%M:%S %z %Y').strftime(
+                '%Y-%m-%dT%H:%M:%S.000Z')
+        except (KeyError, ValueError):
+            timestamp = "No timestamp available"
+
+        image_url = video_url = video_preview_url = None
+        for media in legacy.get('extended_entities', {}).get('media', []):
+            if media.get('type') == 'photo' and image_url is None:
+                image_url = media.get('media_url_https')
+            elif media.get('type') in ('video', 'animated_gif') and video_url is None:
+                variants = [v for v in media.get('video_info', {}).get('variants', [])
+                            if v.get('content_type') == 'video/mp4']
+                if variants:
+                    video_url = max(variants, key=lambda v: v.get('bitrate', 0))['url']
+                video_preview_url = media.get('media_url_https')
+
+        return {
+            'id': legacy['id_str'],
+            'url': f"https://x.com/{author}/status/{legacy['id_str']}",
+            'author': author,
+            'fullName': user_names.get('name', ''),
+            'content': legacy.get('full_text', ''),
+            'timestamp': timestamp,
+            'retweets': str(legacy.get('retweet_count', 0)),
+            'likes': str(legacy.get('favorite_count', 0)),
+            'comments': str(legacy.get('reply_count', 0)),
+            'bookmarks': str(legacy.get('bookmark_count', 0)),
+            'views': result.get('views', {}).get('count'),
+            'image_url': image_url,
+            'video_url': video_url,
+            'video_preview_image_url': video_preview_url,
+        }
+
+    def _tweet_from_data(self, data, hashtag):
+        """
+        Builds a Tweet from the fields returned by EXTRACT_TWEET_JS (or _api_tweet_data).
+
+        Parameters:
+        - data (dict): Extracted tweet fields
+        - hashtag: Context hashtag for the search
+
+        Returns:
+        - Tweet: Tweet object with extracted data
+        """
+        content = data['content']
+
+        # Extract hashtags from content
+        hashtags = tuple(_HASHTAG_RE.findall(content)) if content else ()
+
+        return Tweet(
+            ID=data['id'], author=data['author'], fullName=data['fullName'], content=content,
+            timestamp=data['timestamp'], retweets=data['retweets'], likes=data['likes'],
+            hashtag=hashtag, views=data['views'], comments=data['comments'], bookmarks=data['bookmarks'],
+            image_url=data['image_url'], video_url=data['video_url'],
+            video_preview_image_url=data['video_preview_image_url'], hashtags=hashtags, url=data['url']
+        )
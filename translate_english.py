@@ -4,7 +4,7 @@
 Tweet Translation System - Stage 2
 ==================================
 
-Input: cleaned_tweets_batch{1-56}.csv files
+Input: cleaned_tweets_batch{1-56}.parquet (or legacy .csv) files
 Output: Same files with translated_tweet column added
 
 Author: [yonatan ori]
@@ -12,25 +12,172 @@ Date: July 2025
 """
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import requests
-import time
 import os
-from multiprocessing import Pool, cpu_count
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from requests.adapters import HTTPAdapter
 from typing import List, Optional
+from urllib3.util.retry import Retry
+
+try:
+    from google.cloud import translate_v3
+    TRANSLATE_V3_AVAILABLE = True
+except ImportError:
+    TRANSLATE_V3_AVAILABLE = False
 
 # API settings
 API_KEY = "YOUR_API_KEY_HERE"  # INSERT YOUR API KEY HERE
 TRANSLATE_URL = "https://translation.googleapis.com/language/translate/v2"
 
+# Cloud Translation v3 settings - when google-cloud-translate is installed and
+# a project is set, requests go over one persistent gRPC connection instead of
+# REST (authenticates with GOOGLE_APPLICATION_CREDENTIALS, not API_KEY)
+GCP_PROJECT_ID = "YOUR_PROJECT_ID_HERE"  # INSERT YOUR PROJECT ID HERE
+
 # Processing settings
 INPUT_FOLDER = "/UPDATE/THIS/PATH/"  # UPDATE THIS PATH
 SCRIPT_FOLDER = os.path.dirname(os.path.realpath(__file__))
 BATCH_SIZE = 50          # Number of texts to translate per request
-REQUEST_DELAY = 0.5      # Delay between requests (seconds)
-MAX_WORKERS = 4          # Maximum number of processes
+MAX_WORKERS = 32         # Maximum concurrent translation requests (threads)
+FILE_WORKERS = 4         # Files loaded and translated at the same time
+CHECKPOINT_BATCHES = 20  # Save partial translations every N batches
+TRANSLATION_COLUMNS = ['cleaned_tweet', 'translated_tweet']  # Columns translation reads
 FILE_RANGE = range(1, 57)  # File range to process (1-56)
 
 
+def create_session() -> requests.Session:
+    """
+    Creates an HTTP session keeping connections to the translation API open
+    
+    Returns:
+        Session reusing TCP/TLS connections and retrying transient failures
+        (429 and 5xx responses) with exponential backoff, waiting as long as
+        a Retry-After header asks - the only throttling applied to requests
+    """
+    retry = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504],
+                  allowed_methods=frozenset({'POST'}), respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_maxsize=MAX_WORKERS, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    return session
+
+
+# HTTP session shared by every translate_batch call (and thread)
+SESSION = create_session()
+
+# Cloud Translation v3 client shared by all threads (created in main)
+V3_CLIENT = None
+
+
+def v3_configured() -> bool:
+    """Returns True if translation should use the Cloud Translation v3 client"""
+    return TRANSLATE_V3_AVAILABLE and GCP_PROJECT_ID not in ("", "YOUR_PROJECT_ID_HERE")
+
+
+def batch_file_path(folder: str, file_index: int) -> str:
+    """
+    Returns path of a batch file, preferring Parquet over legacy CSV
+    
+    Args:
+        folder: Folder containing the batch files
+        file_index: Batch file number
+        
+    Returns:
+        Path of the .parquet file, or of the .csv file if only that exists
+    """
+    parquet_path = os.path.join(folder, f"cleaned_tweets_batch{file_index}.parquet")
+    if os.path.exists(parquet_path):
+        return parquet_path
+    return os.path.join(folder, f"cleaned_tweets_batch{file_index}.csv")
+
+
+def read_batch(file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Loads a batch file in Parquet or CSV format (by extension)
+    
+    Args:
+        file_path: Batch file path
+        columns: Only load these columns of a Parquet file, skipping any
+            it doesn't have (all columns if None; CSV files are always
+            loaded whole, since they are saved whole)
+        
+    Returns:
+        Loaded DataFrame
+    """
+    if file_path.endswith('.parquet'):
+        if columns is not None:
+            available = set(pq.read_schema(file_path).names)
+            columns = [column for column in columns if column in available]
+        return pd.read_parquet(file_path, columns=columns)
+    return pd.read_csv(file_path)
+
+
+def write_batch(df: pd.DataFrame, file_path: str) -> None:
+    """Saves a batch file in Parquet or CSV format (by extension)"""
+    if file_path.endswith('.parquet'):
+        df.to_parquet(file_path, compression='zstd', index=False)
+    else:
+        df.to_csv(file_path, index=False, encoding='utf-8')
+
+
+def write_translations(df: pd.DataFrame, file_path: str) -> None:
+    """
+    Saves the translated_tweet column of df into a batch file
+    
+    Args:
+        df: DataFrame with a translated_tweet column, row-aligned with the file
+        file_path: Batch file path
+        
+    Notes:
+        - Parquet files keep their other columns untouched: only the
+          translation column is replaced (or added) at the Arrow level, so
+          df may hold just the columns needed for translation
+        - CSV files are rewritten from df, which must hold all columns
+    """
+    if not file_path.endswith('.parquet'):
+        write_batch(df, file_path)
+        return
+    
+    table = pq.read_table(file_path)
+    translations = pa.array(df['translated_tweet'].tolist(), type=pa.string())
+    if 'translated_tweet' in table.column_names:
+        table = table.set_column(table.column_names.index('translated_tweet'), 'translated_tweet', translations)
+    else:
+        table = table.append_column('translated_tweet', translations)
+    
+    # Replace the file only once the new one is complete
+    tmp_path = file_path + '.tmp'
+    pq.write_table(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, file_path)
+
+
+def convert_batches_to_parquet(folder: str, file_range: range) -> None:
+    """
+    Writes a Parquet copy next to each legacy CSV batch file (one-time)
+    
+    Args:
+        folder: Folder containing the batch files
+        file_range: Batch file numbers
+        
+    Notes:
+        - Batch files without a Parquet copy are converted; later runs
+          read the Parquet files (see batch_file_path), loading only the
+          translation columns
+    """
+    for file_index in file_range:
+        csv_path = os.path.join(folder, f"cleaned_tweets_batch{file_index}.csv")
+        parquet_path = os.path.join(folder, f"cleaned_tweets_batch{file_index}.parquet")
+        if os.path.exists(csv_path) and not os.path.exists(parquet_path):
+            print(f"🗜️  Converting {os.path.basename(csv_path)} to Parquet")
+            # Replace in one step, so an interrupted conversion leaves no partial copy
+            tmp_path = parquet_path + '.tmp'
+            pd.read_csv(csv_path).to_parquet(tmp_path, compression='zstd', index=False)
+            os.replace(tmp_path, parquet_path)
+
+
 def translate_batch(texts: List[str]) -> List[str]:
     """
     Translates list of texts from Russian to English
@@ -48,6 +195,9 @@ def translate_batch(texts: List[str]) -> List[str]:
     """
     if not texts:
         return []
+    
+    if V3_CLIENT is not None:
+        return translate_batch_v3(texts)
         
     # Build request parameters
     params = {
@@ -60,7 +210,7 @@ def translate_batch(texts: List[str]) -> List[str]:
     
     try:
         # Execute translation request
-        response = requests.post(TRANSLATE_URL, data=params, timeout=30)
+        response = SESSION.post(TRANSLATE_URL, data=params, timeout=30)
         response.raise_for_status()  # Raise exception if status code not OK
         
         result = response.json()
@@ -81,19 +231,50 @@ def translate_batch(texts: List[str]) -> List[str]:
         return ["" for _ in texts]
 
 
-def process_file(file_index: int) -> None:
+def translate_batch_v3(texts: List[str]) -> List[str]:
+    """
+    Translates list of texts from Russian to English with Cloud Translation v3
+    
+    Args:
+        texts: List of texts to translate
+        
+    Returns:
+        List of translated texts (same length as input)
+        
+    Notes:
+        - Same contract as translate_batch; the client retries transient
+          errors itself
+    """
+    try:
+        response = V3_CLIENT.translate_text(request={
+            "parent": f"projects/{GCP_PROJECT_ID}/locations/global",
+            "contents": texts,
+            "source_language_code": "ru",
+            "target_language_code": "en",
+            "mime_type": "text/plain",
+        })
+        return [t.translated_text for t in response.translations]
+    except Exception as e:
+        print(f"❌ Error in v3 batch translation: {e}")
+        return ["" for _ in texts]
+
+
+def process_file(file_index: int, executor: ThreadPoolExecutor) -> None:
     """
     Processes single file - translates all tweets in file
     
     Args:
         file_index: File number to process
+        executor: Thread pool running the translation requests
         
     Notes:
-        - Loads file, translates in batches and saves in place
+        - Loads file, translates batches concurrently and saves in place
         - Shows progress for each file
-        - Skips files that already have translation
+        - Only translates tweets without a translation, so interrupted
+          runs resume where they stopped (progress saved every
+          CHECKPOINT_BATCHES batches)
     """
-    file_path = os.path.join(INPUT_FOLDER, f"cleaned_tweets_batch{file_index}.csv")
+    file_path = batch_file_path(INPUT_FOLDER, file_index)
     
     # Check file existence
     if not os.path.exists(file_path):
@@ -103,71 +284,73 @@ def process_file(file_index: int) -> None:
     print(f"📁 Processing file {file_index}: {os.path.basename(file_path)}")
     
     try:
-        # Load the file
-        df = pd.read_csv(file_path)
+        # Load the file (only the translation columns of Parquet files)
+        df = read_batch(file_path, columns=TRANSLATION_COLUMNS)
         
         # Check for clean tweets column existence
         if 'cleaned_tweet' not in df.columns:
             print(f"⚠️  'cleaned_tweet' column missing in file {file_index}, skipping")
             return
         
-        # Create translation column if not exists
+        # Create translation column if not exists (rows translated by an
+        # earlier, possibly interrupted, run are kept)
         if 'translated_tweet' not in df.columns:
             df['translated_tweet'] = ""
+        df['translated_tweet'] = df['translated_tweet'].fillna("").astype(str)
         
-        # Prepare tweet list for translation
-        tweets = df['cleaned_tweet'].fillna("").astype(str).tolist()
+        # Prepare tweet list for translation (only non-empty texts)
+        tweets = df['cleaned_tweet'].fillna("").astype(str).str.strip()
         total_tweets = len(tweets)
         
         if total_tweets == 0:
             print(f"⚠️  No tweets to translate in file {file_index}")
             return
         
-        print(f"🔤 Starting translation of {total_tweets:,} tweets...")
+        # Skip tweets that already have a translation
+        todo_mask = tweets.ne("") & df['translated_tweet'].str.strip().eq("")
+        todo_index = df.index[todo_mask]
+        if len(todo_index) == 0:
+            print(f"⏭️  File {file_index} has no untranslated tweets, skipping")
+            return
         
-        # Translate in batches
-        all_translations = []
-        for start in range(0, total_tweets, BATCH_SIZE):
-            end = min(start + BATCH_SIZE, total_tweets)
-            
-            # Prepare batch for translation (only non-empty texts)
-            batch_tweets = []
-            batch_indices = []
-            
-            for i in range(start, end):
-                tweet = tweets[i].strip()
-                if tweet:  # Only if tweet is not empty
-                    batch_tweets.append(tweet)
-                    batch_indices.append(i)
-            
-            # Translate the batch
-            if batch_tweets:
-                translated_batch = translate_batch(batch_tweets)
-                
-                # Map results back to original positions
-                for idx, translation in zip(batch_indices, translated_batch):
-                    while len(all_translations) <= idx:
-                        all_translations.append("")
-                    all_translations[idx] = translation
+        # Translate each distinct text once (retweets and copies repeat a lot)
+        todo_tweets = tweets[todo_mask]
+        unique_tweets = todo_tweets.unique().tolist()
+        print(f"🔤 Starting translation of {len(todo_tweets):,}/{total_tweets:,} untranslated tweets "
+              f"({len(unique_tweets):,} unique texts)...")
+        
+        # Submit batches for concurrent translation
+        batch_futures = []
+        for start in range(0, len(unique_tweets), BATCH_SIZE):
+            batch_tweets = unique_tweets[start:start + BATCH_SIZE]
+            batch_futures.append((batch_tweets, executor.submit(translate_batch, batch_tweets)))
+        
+        translation_map = {}
+        
+        def apply_translations():
+            """Copies the translations so far to every row with that text"""
+            df.loc[todo_mask, 'translated_tweet'] = todo_tweets.map(translation_map).fillna("")
+        
+        # Collect translations in order
+        for batch_number, (batch_tweets, future) in enumerate(batch_futures, start=1):
+            translation_map.update(zip(batch_tweets, future.result()))
             
             # Show progress
-            progress = min(end, total_tweets)
-            print(f"📝 File {file_index}: translated {progress:,}/{total_tweets:,} tweets "
-                  f"({progress/total_tweets*100:.1f}%)")
+            progress = len(translation_map)
+            print(f"📝 File {file_index}: translated {progress:,}/{len(unique_tweets):,} unique texts "
+                  f"({progress/len(unique_tweets)*100:.1f}%)")
             
-            # Delay between requests to avoid API limits
-            time.sleep(REQUEST_DELAY)
+            # Save completed batches so a crash doesn't pay for them again
+            if batch_number % CHECKPOINT_BATCHES == 0:
+                apply_translations()
+                write_translations(df, file_path)
         
-        # Complete translation list to required length
-        while len(all_translations) < total_tweets:
-            all_translations.append("")
-        
-        # Update DataFrame and save
-        df['translated_tweet'] = all_translations[:total_tweets]
-        df.to_csv(file_path, index=False, encoding='utf-8')
+        # Save the file
+        apply_translations()
+        write_translations(df, file_path)
         
         # Statistics
-        successful_translations = sum(1 for t in all_translations if t.strip())
+        successful_translations = int(df['translated_tweet'].str.strip().ne("").sum())
         print(f"✅ File {file_index} completed: {successful_translations:,}/{total_tweets:,} "
               f"tweets translated successfully ({successful_translations/total_tweets*100:.1f}%)")
         
@@ -179,25 +362,36 @@ def main():
     """
     Main function - manages parallel translation process
     """
+    global V3_CLIENT
+    
     print("🚀 Starting tweet translation to English")
-    print(f"🔧 Settings: Batch={BATCH_SIZE}, Delay={REQUEST_DELAY}s, Workers={MAX_WORKERS}")
+    print(f"🔧 Settings: Batch={BATCH_SIZE}, Workers={MAX_WORKERS}, Files={FILE_WORKERS}")
     print(f"📊 File range: {FILE_RANGE.start}-{FILE_RANGE.stop-1}")
     
+    # Use the gRPC client when configured
+    if v3_configured():
+        V3_CLIENT = translate_v3.TranslationServiceClient()
+        print(f"🔌 Using Cloud Translation v3 (project {GCP_PROJECT_ID})")
+    
     # Check API Key validity
-    if not API_KEY or API_KEY == "YOUR_API_KEY_HERE":
-        print("❌ Error: Valid API_KEY required for Google Translate service")
+    elif not API_KEY or API_KEY == "YOUR_API_KEY_HERE":
+        print("❌ Error: Valid API_KEY (or GCP_PROJECT_ID for v3) required for Google Translate service")
         return
     
-    # Calculate optimal number of workers
-    num_workers = min(cpu_count(), MAX_WORKERS)
-    print(f"⚙️  Using {num_workers} parallel processes")
+    # Translation is network bound, so threads sharing one HTTP session go
+    # much wider than processes
+    print(f"⚙️  Using {MAX_WORKERS} translation threads for {FILE_WORKERS} files at a time")
     
     try:
+        # Columnar copies of legacy CSV batches, read column by column
+        convert_batches_to_parquet(INPUT_FOLDER, FILE_RANGE)
+        
         # Parallel processing of files
-        with Pool(num_workers) as pool:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as translator, \
+                ThreadPoolExecutor(max_workers=FILE_WORKERS) as file_executor:
             # Process in reverse order (high to low) for debugging purposes
             file_list = list(reversed(FILE_RANGE))
-            pool.map(process_file, file_list)
+            list(file_executor.map(partial(process_file, executor=translator), file_list))
         
         print("🎉 Translation of all files completed successfully!")
         
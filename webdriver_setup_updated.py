@@ -13,6 +13,8 @@ Author: Jonathan Uri
 Date: December 2024
 """
 
+import json
+import os
 import time
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -21,7 +23,132 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+
+# Logged-in drivers shared by get_driver() callers, keyed by process ID (a
+# forked worker process must not reuse its parent's browser session)
+_DRIVERS = {}
+
+# Present on X pages only when logged in
+LOGGED_IN_SEL = (By.CSS_SELECTOR, 'nav[role="navigation"]')
+
+# Requests the scraper never needs: media streams, fonts, images, analytics
+# and ads (media URLs are read from DOM attributes, not fetched)
+BLOCKED_URL_PATTERNS = [
+    "*.mp4", "*.m3u8", "*.ts", "*.woff*",
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp",
+    "*google-analytics*", "*doubleclick*", "*/ads/*",
+]
+
+# Session cookies saved after a successful login, restored on later runs
+COOKIE_FILE = 'twitter_cookies.json'
+
+def get_driver():
+    """
+    Returns this process's shared logged-in WebDriver, creating it on first use.
+
+    Browser startup and login take many seconds, so batch scripts should call
+    this once and reuse the driver for every query instead of launching one
+    per scraper.
+
+    Returns:
+    - webdriver.Chrome: Logged-in WebDriver instance
+    """
+    pid = os.getpid()
+    if pid not in _DRIVERS:
+        _DRIVERS[pid] = setup_web_driver()
+    return _DRIVERS[pid]
+
+def quit_driver():
+    """Quits this process's shared WebDriver created by get_driver(), if any"""
+    driver = _DRIVERS.pop(os.getpid(), None)
+    if driver is not None:
+        driver.quit()
+
+def is_logged_in(driver):
+    """
+    Checks without waiting whether the current page shows a logged-in session.
+
+    Parameters:
+    - driver: WebDriver instance
+
+    Returns:
+    - bool: True if the logged-in navigation bar is present
+    """
+    return bool(driver.find_elements(*LOGGED_IN_SEL))
+
+def block_unneeded_requests(driver, patterns=BLOCKED_URL_PATTERNS):
+    """
+    Blocks network requests matching URL patterns via the Chrome DevTools Protocol.
+
+    Parameters:
+    - driver: Chrome WebDriver instance
+    - patterns (list): URL patterns, '*' matching any characters
+
+    Returns:
+    - bool: True if the patterns were applied
+    """
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        return True
+    except WebDriverException as e:
+        print(f"⚠️  Could not block unneeded requests: {e}")
+        return False
+
+def save_session_cookies(driver, cookie_file=COOKIE_FILE):
+    """
+    Saves the browser's X session cookies for restore_session_cookies().
+
+    Parameters:
+    - driver: Logged-in WebDriver instance
+    - cookie_file (str): Output JSON file
+    """
+    # Owner-only permissions: the cookies are a live account session
+    fd = os.open(cookie_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    os.chmod(cookie_file, 0o600)  # Also tighten a file saved by an earlier version
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(driver.get_cookies(), f)
+    print(f"🍪 Session cookies saved to {cookie_file}")
+
+def restore_session_cookies(driver, cookie_file=COOKIE_FILE):
+    """
+    Logs in by loading saved session cookies instead of typing credentials.
+
+    Parameters:
+    - driver: WebDriver instance
+    - cookie_file (str): JSON file written by save_session_cookies()
+
+    Returns:
+    - bool: True if the restored session is logged in
+    """
+    if not os.path.exists(cookie_file):
+        return False
+
+    try:
+        with open(cookie_file, encoding='utf-8') as f:
+            cookies = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"⚠️  Could not read saved session cookies ({e}), logging in again")
+        return False
+
+    print("🍪 Restoring saved session cookies...")
+    # Cookies can only be added for the domain currently loaded
+    driver.get('https://x.com')
+    for cookie in cookies:
+        try:
+            driver.add_cookie(cookie)
+        except WebDriverException:
+            pass  # Skip cookies the browser rejects (e.g. expired)
+    driver.refresh()
+
+    try:
+        WebDriverWait(driver, 10).until(EC.presence_of_element_located(LOGGED_IN_SEL))
+        print("✅ Logged in with saved session")
+        return True
+    except TimeoutException:
+        print("⚠️  Saved session expired, logging in again")
+        return False
 
 def setup_web_driver():
     """
@@ -29,8 +156,8 @@ def setup_web_driver():
     
     Features:
     - Automatic Chrome driver installation
-    - Optimized Chrome options for scraping
-    - Automated Twitter login flow
+    - Optimized Chrome options for scraping (headless, no image downloads)
+    - Session restore from saved cookies, falling back to automated Twitter login
     - Error handling for login issues
     
     Returns:
@@ -49,12 +176,18 @@ def setup_web_driver():
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--disable-gpu")
     chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument("--disable-extensions")
+    
+    # Scraping only reads the DOM, so skip rendering a visible window
+    chrome_options.add_argument("--headless=new")
     
-    # Optional: Run in headless mode (uncomment next line)
-    # chrome_options.add_argument("--headless")
+    # Don't download images - their src/poster URLs are still in the DOM
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
     
-    # Disable images for faster loading (optional)
-    # chrome_options.add_argument("--disable-images")
+    # Return from driver.get() once the DOM is ready instead of after every
+    # subresource - pages are queried with explicit waits afterwards
+    chrome_options.page_load_strategy = "eager"
     
     # User agent to avoid detection
     chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
@@ -64,20 +197,29 @@ def setup_web_driver():
         service = Service(executable_path=CM().install())
         driver = webdriver.Chrome(service=service, options=chrome_options)
         print("✅ Chrome WebDriver initialized successfully")
+        # Lookups of missing elements fail fast; waits are always explicit
+        driver.implicitly_wait(0)
+        block_unneeded_requests(driver)
         
     except Exception as e:
         print(f"❌ Error initializing WebDriver: {e}")
         raise
 
+    # Reuse the session of an earlier login when possible
+    if restore_session_cookies(driver):
+        return driver
+
     # Navigate to Twitter login page via search (helps avoid detection)
     login_url = 'https://x.com/search?q=%28%23Cake%29+until%3A2019-11-21+since%3A2006-12-17&src=typed_query&f=live'
     print(f"🌐 Navigating to Twitter login page...")
     driver.get(login_url)
 
-    # Automated login flow
-    success = perform_twitter_login(driver)
+    # Automated login flow, unless the browser is already logged in
+    success = is_logged_in(driver) or perform_twitter_login(driver)
     
-    if not success:
+    if success:
+        save_session_cookies(driver)
+    else:
         print("⚠️  Login may have failed, but continuing with scraping...")
         # Don't quit driver - some scraping might still work
     
@@ -118,13 +260,13 @@ def perform_twitter_login(driver):
         )
         username_input.clear()
         username_input.send_keys(USERNAME)
-        time.sleep(2)
 
         # Step 2: Click 'Next' button
         print("▶️  Clicking Next button...")
-        next_button = driver.find_element(By.XPATH, '//span[text()="Next"]/ancestor::button')
+        next_button = WebDriverWait(driver, 15).until(
+            EC.element_to_be_clickable((By.XPATH, '//span[text()="Next"]/ancestor::button'))
+        )
         next_button.click()
-        time.sleep(3)
 
         # Step 3: Wait for password field and enter password
         print("🔒 Entering password...")
@@ -133,21 +275,21 @@ def perform_twitter_login(driver):
         )
         password_input.clear()
         password_input.send_keys(PASSWORD)
-        time.sleep(2)
 
         # Step 4: Click 'Log in' button
         print("🚪 Clicking Log in button...")
-        login_button = driver.find_element(By.XPATH, '//span[text()="Log in"]/ancestor::button')
+        login_button = WebDriverWait(driver, 15).until(
+            EC.element_to_be_clickable((By.XPATH, '//span[text()="Log in"]/ancestor::button'))
+        )
         login_button.click()
         
         # Step 5: Wait for login to complete
         print("⏳ Waiting for login to complete...")
-        time.sleep(8)
 
         # Verify login success by checking for home timeline or search results
         try:
             # Check if we're successfully logged in (look for common post-login elements)
-            WebDriverWait(driver, 10).until(
+            WebDriverWait(driver, 20).until(
                 EC.any_of(
                     EC.presence_of_element_located((By.XPATH, '//article[@data-testid="tweet"]')),
                     EC.presence_of_element_located((By.XPATH, '//nav[@role="navigation"]')),